@@ -1,125 +1,222 @@
 import asyncio
-from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import (
+    NOT_GIVEN,
     AgentSession,
     Agent,
     RoomInputOptions,
     UserInputTranscribedEvent,
     ConversationItemAddedEvent,
 )
-from livekit.plugins import google, noise_cancellation, silero, cartesia
 from prompts import (
     AGENT_INSTRUCTION,
-    MENTAL_SESSION_INSTRUCTION,
-    PHYSICAL_SESSION_INSTRUCTION,
     GLOBAL_BEHAVIOR_INSTRUCTION,
 )
-from livekit.agents.llm import ImageContent, AudioContent, ChatMessage
+from instructions import get_instructions
+from livekit.agents.llm import ImageContent, AudioContent, ChatMessage, ChatContext
 import logging
 from livekit import rtc
-import json
 import os
 from datetime import datetime
+from journal import ConversationJournal, recover_orphaned
+from log_setup import setup_logging, bind_log_context, debug_log, with_log_context
+from turn_metrics import TurnTimer, export_worker_metrics, run_exporter
+from scheduler import SessionScheduler
+from context_manager import ContextManager, llm_summarizer
+from tone import ToneState
+from ingest import DataIngest
+from tts_cache import TTSAudioCache, SCRIPTED_LINES, play_scripted
+from conversation_store import ConversationStore, format_history
+from recommendations import enqueue_conversation
+from vision import VideoPolicy
+from capacity import JobMonitor, worker_options
+from endpointing import SpeculationTracker, session_options, turn_detector_module
+from failover import LLMHedge, ProviderMonitor, prewarm_connections, with_fallback
+import providers
+
+# seconds to wait for the user after connecting before starting without history
+USER_JOIN_TIMEOUT = 5.0
 
-os.makedirs("./conversations", exist_ok=True)
-os.makedirs("./recommendations", exist_ok=True)
-os.makedirs("./logs", exist_ok=True)
 
-load_dotenv(".env.local")
+# ---------------------------
+# Process init
+# ---------------------------
+# Kept out of module import so job processes (and tools that import this
+# module) only pay for it where it is needed: the worker's main process,
+# prewarm, and the entrypoint. Idempotent.
+_initialized = False
+
+
+def init_runtime() -> None:
+    global _initialized
+    if _initialized:
+        return
+    from dotenv import load_dotenv
+
+    for directory in ("./conversations", "./recommendations", "./logs"):
+        os.makedirs(directory, exist_ok=True)
+    load_dotenv(".env.local")
+    setup_logging()
+    _initialized = True
+
+
+def preload_plugins() -> list:
+    return providers.preload(extra_modules=(turn_detector_module(),))
 
 
 # ---------------------------
 # Assistant class with persistent global behavior
 # ---------------------------
 class Assistant(Agent):
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        vad,
+        stt,
+        tts,
+        llm,
+        context_manager=None,
+        chat_ctx=None,
+        video_policy=None,
+        llm_hedge=None,
+    ) -> None:
         super().__init__(
             instructions=GLOBAL_BEHAVIOR_INSTRUCTION + AGENT_INSTRUCTION,
-
-            stt=cartesia.STT(
-                model="ink-whisper",
-                language="en",
-            ),
-
-            tts=cartesia.TTS(
-                model="sonic-3",
-            ),
-
-            llm=google.LLM(
-                model="gemini-2.5-flash",
-                temperature=0.8,
-            ),
-
-            vad=silero.VAD.load(),
+            chat_ctx=chat_ctx,
+            stt=stt,
+            tts=tts,
+            llm=llm,
+            vad=vad,
         )
+        self.context_manager = context_manager
+        self.video_policy = video_policy
+        self.llm_hedge = llm_hedge
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        # attach the latest changed camera frame, if the user allowed it
+        if self.video_policy is not None:
+            image = self.video_policy.image_content()
+            if image is not None:
+                new_message.content.append(image)
+
+    def llm_node(self, chat_ctx, tools, model_settings):
+        # Bound what is sent per request: recent turns verbatim, older ones
+        # as the rolling summary, all within the token budget.
+        if self.context_manager is not None:
+            chat_ctx = self.context_manager.trim_chat_ctx(chat_ctx)
+        if self.llm_hedge is not None:
+            # primary and secondary model under the first-token SLO
+            return self.llm_hedge.chat(
+                chat_ctx,
+                tools,
+                model_settings.tool_choice if model_settings else NOT_GIVEN,
+                self.session.conn_options.llm_conn_options,
+            )
+        return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
 
 
 # ---------------------------
-# Utility: simple sentiment/tone hint detector (lightweight)
+# Worker prewarm: load the VAD model and provider clients once per process
 # ---------------------------
-def detect_sentiment_hint(text: str) -> str:
-    lower = text.lower()
-    # very small keyword-based detector for tone modulation
-    low_words = [
-        "tired",
-        "tire",
-        "stressed",
-        "stressing",
-        "sad",
-        "anxious",
-        "worried",
-        "down",
-        "depressed",
-        "overwhelmed",
-    ]
-    high_words = ["good", "great", "energized", "happy", "awesome", "fine", "well"]
-    if any(w in lower for w in low_words):
-        return "low"
-    if any(w in lower for w in high_words):
-        return "high"
-    return "neutral"
+def build_providers() -> dict:
+    # the configured STT/TTS/LLM and their secondary models (see providers.py)
+    built = {}
+    for kind in ("stt", "tts", "llm"):
+        built[kind] = providers.build(kind)
+        built[f"{kind}_fallback"] = providers.build_fallback(kind)
+    return built
+
+
+def prewarm(proc: agents.JobProcess):
+    # Runs in each idle worker process before it is handed a job, so the
+    # model load and client construction stay off the room-join path.
+    init_runtime()
+    preload_plugins()
+    proc.userdata["vad"] = providers.build("vad")
+    proc.userdata.update(build_providers())
+    proc.userdata["tts_cache"] = TTSAudioCache()
+    proc.userdata["conversation_store"] = ConversationStore()
+
+
+def get_components(proc: agents.JobProcess) -> dict:
+    # Fall back to loading inline if the process was not prewarmed
+    # (e.g. a custom runner that doesn't pass prewarm_fnc).
+    if "vad" not in proc.userdata:
+        prewarm(proc)
+    return {key: proc.userdata[key] for key in ("vad", "stt", "tts", "llm")}
 
 
 # ---------------------------
 # Entrypoint
 # ---------------------------
 async def entrypoint(ctx: agents.JobContext):
-    session = AgentSession()
+    init_runtime()
+    bind_log_context(room=ctx.job.room.name, session=ctx.job.id)
+    video = VideoPolicy()  # camera stays off until the user consents
+    # semantic end-of-turn + speculative LLM requests (see endpointing.py)
+    session = AgentSession(
+        video_sampler=video,
+        conn_options=providers.session_conn_options(),
+        **session_options(),
+    )
     session_mode = "mental"  # default startup mode
-    conversation = []
-    message_data = {}  # safe default
-
-    # Helper to build instructions with tone hint and optional soft transition
-    def build_mode_instructions(mode: str, tone_hint: str = "neutral"):
-        mode_instr = (
-            MENTAL_SESSION_INSTRUCTION
-            if mode == "mental"
-            else PHYSICAL_SESSION_INSTRUCTION
-        )
-        soft_transition = f"\nYou’re now in {mode} wellness mode — let’s continue naturally from where we left off.\n"
-        # Keep GLOBAL_BEHAVIOR_INSTRUCTION persistent + optional tone hint guideline
-        tone_guideline = f"\n(When replying, adopt a '{tone_hint}' energy level in tone and pacing.)\n"
-        return (
-            GLOBAL_BEHAVIOR_INSTRUCTION + soft_transition + tone_guideline + mode_instr
+    journal = ConversationJournal(room_name=ctx.job.room.name)
+    journal.start()
+    scheduler = SessionScheduler()
+    components = get_components(ctx.proc)
+    # failover to the secondary models, with per-provider counters
+    provider_monitor = ProviderMonitor()
+    # the configured models themselves: cached scripted audio is keyed by the
+    # primary TTS voice, and prewarm opens the primaries' connections
+    primaries = {kind: components[kind] for kind in ("stt", "tts")}
+    for kind in ("stt", "tts"):
+        components[kind] = with_fallback(
+            kind, components[kind], ctx.proc.userdata.get(f"{kind}_fallback"), provider_monitor
         )
+    llm_hedge = LLMHedge(
+        components["llm"],
+        ctx.proc.userdata.get("llm_fallback"),
+        ttft_slo=providers.ttft_slo(),
+        monitor=provider_monitor,
+    )
+    context = ContextManager(summarizer=llm_summarizer(components["llm"]))
+    audio_cache = ctx.proc.userdata.get("tts_cache")
+    store = ctx.proc.userdata.get("conversation_store") or ConversationStore()
+    turn_timer = TurnTimer()
+    turn_timer.attach(session)
+    speculation = SpeculationTracker()
+    speculation.attach(session)
+    scheduler.spawn(run_exporter())
+    # heartbeat for the worker's load_fnc; ends the job before the hard
+    # memory limit would kill it mid-sentence
+    job_monitor = JobMonitor(ctx.job.id, on_over_budget=lambda: end_over_budget())
+    scheduler.spawn(job_monitor.run())
+    tone_state = ToneState()  # smoothed over the user's speech and typed chat
 
     # ---------------------------~
     # Session switching
     # ---------------------------
-    async def switch_session_mode(mode: str, tone_hint: str = "neutral"):
+    async def speak_scripted(line: str):
+        # fixed lines skip the LLM; pre-rendered audio skips TTS as well
+        handle = await play_scripted(
+            session, audio_cache, primaries["tts"], SCRIPTED_LINES[line]
+        )
+        await handle
+
+    async def switch_session_mode(mode: str, tone_hint: str | None = None):
         nonlocal session_mode
+        tone_hint = tone_hint or tone_state.label
         if mode == session_mode:
-            # no-op if already in mode; optionally remind softly
-            await session.generate_reply(
-                instructions=f"{GLOBAL_BEHAVIOR_INSTRUCTION}\nWe’re already in {mode} mode — continuing from here."
-            )
+            # no-op if already in mode; softly acknowledge with the fixed line
+            await speak_scripted(f"already:{mode}")
             return
 
         session_mode = mode
+        video.set_mode(mode)
+        if mode == "physical":
+            await speak_scripted("safety_note")
         # Soft verbal acknowledgment + mode instructions
         await session.generate_reply(
-            instructions=build_mode_instructions(mode, tone_hint)
+            instructions=get_instructions(mode, tone_hint, "switch")
         )
 
     # ---------------------------
@@ -129,7 +226,7 @@ async def entrypoint(ctx: agents.JobContext):
     last_transcript = ""
 
     def on_user_input_transcribed(event: UserInputTranscribedEvent):
-        asyncio.create_task(handle_user_input_transcribed(event))
+        scheduler.spawn(handle_user_input_transcribed(event))
 
     async def handle_user_input_transcribed(event: UserInputTranscribedEvent):
         nonlocal last_transcript, session_mode
@@ -148,49 +245,59 @@ async def entrypoint(ctx: agents.JobContext):
             f"USER({event.speaker_id}): {transcript} "
             f"(lang={event.language}, final={event.is_final})"
         )
-        print(f"USER({event.speaker_id}): {transcript}")
+        debug_log.debug(f"USER({event.speaker_id}): {transcript}")
 
+        tone_state.update(transcript)
+        video.note_user(transcript)
         lower = transcript.lower()
 
         # Mode switching commands
+        # (queued under one key so a newer turn supersedes a stale one)
         if "mental session" in lower or "mental wellness" in lower:
-            await switch_session_mode("mental")
+            scheduler.submit(lambda: switch_session_mode("mental"), key="user_turn")
             return
 
         elif "physical session" in lower or "physical wellness" in lower:
-            await switch_session_mode("physical")
+            scheduler.submit(lambda: switch_session_mode("physical"), key="user_turn")
             return
 
-    session.on("user_input_transcribed", on_user_input_transcribed)
+    session.on("user_input_transcribed", with_log_context(on_user_input_transcribed))
 
     # Conversation item logging
     @session.on("conversation_item_added")
+    @with_log_context
     def on_conversation_item_added(event: ConversationItemAddedEvent):
         try:
-            print(
-                f"Conversation item added from {event.item.role}: {event.item.text_content}. "
-                f"interrupted: {event.item.interrupted}"
-            )
-            for content in event.item.content:
-                if isinstance(content, str):
-                    print(f" - text: {content}")
-                elif isinstance(content, ImageContent):
-                    print(f" - image: {content.image}")
-                elif isinstance(content, AudioContent):
-                    print(f" - audio frame, transcript available")
-
-            # store both assistant and user items in conversation list
-            conversation.append(
-                {
-                    "id": getattr(event.item, "id", None),
-                    "role": event.item.role,
-                    "text": event.item.text_content,
-                    "interrupted": event.item.interrupted,
-                    "created_at": getattr(event.item, "created_at", None),
-                }
-            )
+            if debug_log.isEnabledFor(logging.DEBUG):
+                debug_log.debug(
+                    f"Conversation item added from {event.item.role}: {event.item.text_content}. "
+                    f"interrupted: {event.item.interrupted}"
+                )
+                for content in event.item.content:
+                    if isinstance(content, str):
+                        debug_log.debug(f" - text: {content}")
+                    elif isinstance(content, ImageContent):
+                        debug_log.debug(f" - image: {content.image}")
+                    elif isinstance(content, AudioContent):
+                        debug_log.debug(f" - audio frame, transcript available")
+
+            # append both assistant and user items to the conversation journal
+            record = {
+                "id": getattr(event.item, "id", None),
+                "role": event.item.role,
+                "text": event.item.text_content,
+                "interrupted": event.item.interrupted,
+                "created_at": getattr(event.item, "created_at", None),
+            }
+            journal.append(record)
+            context.add(record)
+
+            # fold evicted turns into the rolling summary between turns
+            if event.item.role == "assistant" and context.needs_summary():
+                scheduler.spawn(context.summarize_pending())
 
             if event.item.role == "assistant":
+                video.note_assistant(event.item.text_content or "")
                 logging.info(
                     f"ASSISTANT({getattr(event.item, 'id', '')}): {event.item.text_content} (interrupted={event.item.interrupted})"
                 )
@@ -200,95 +307,134 @@ async def entrypoint(ctx: agents.JobContext):
     # ---------------------------
     # Data packet handler (typed chat)
     # ---------------------------
-    def on_data_received_sync(data: rtc.DataPacket):
-        asyncio.create_task(on_data_received_async(data))
+    def on_typed_turn(text: str):
+        logging.info(f"User typed: {text}")
+        tone_hint = tone_state.update(text)
+        video.note_user(text)
+        meta = get_instructions(session_mode, tone_hint, "chat")
+        # generate reply that will also be spoken; shares the user-turn key
+        # so a newer spoken or typed turn supersedes it while queued
+        scheduler.submit(
+            lambda: session.generate_reply(user_input=text, instructions=meta),
+            key="user_turn",
+        )
 
-    async def on_data_received_async(data: rtc.DataPacket):
-        nonlocal message_data
-        try:
-            # try JSON first
-            payload = data.data.decode("utf-8")
-            parsed = json.loads(payload)
-            message_data = parsed  # store last parsed data safely
-            # safe logging: use .get to avoid KeyError
-            logging.info(
-                f"Received data message: {parsed.get('message', '<no message field>')}"
-            )
-            # Handle typed chat messages - DON'T echo them back
-            if parsed.get("type") == "chat":
-                user_message = parsed.get("text", "")
-                logging.info(f"User typed: {user_message}")
-                # generate reply that will also be spoken
-                tone_hint = detect_sentiment_hint(user_message or "")
-                meta = f"Maintain a '{tone_hint}' energy and flow naturally. {GLOBAL_BEHAVIOR_INSTRUCTION}"
-                # await session.generate_reply(user_input=user_message, instructions=meta)
-            else:
-                # handle other structured data if needed
-                pass
-
-        except json.JSONDecodeError:
-            # Handle plain text messages
-            text_message = data.data.decode("utf-8").strip()
-            if text_message:
-                logging.info(f"Received plain text: {text_message}")
-                tone_hint = detect_sentiment_hint(text_message)
-                meta = f"Maintain a '{tone_hint}' energy and flow naturally. {GLOBAL_BEHAVIOR_INSTRUCTION}"
-                # await session.generate_reply(user_input=text_message, instructions=meta)
-        except Exception as e:
-            logging.error(f"Error handling data packet: {e}")
+    ingest = DataIngest(on_typed_turn)
+
+    def on_data_received_sync(data: rtc.DataPacket):
+        # decode + coalesce inline; only a finished turn schedules work
+        ingest.feed(data.data)
 
-    ctx.room.on("data_received", on_data_received_sync)
+    ctx.room.on("data_received", with_log_context(on_data_received_sync))
 
     # ---------------------------
     # Connect and start session
     # ---------------------------
+    # provider connections open while the room joins
+    prewarm_connections(primaries["stt"], primaries["tts"], components["llm"])
     await ctx.connect()
 
+    # Continuity: notes from the user's recent sessions, fetched within a
+    # tight budget so a slow lookup never delays the greeting. The user may
+    # still be joining right after connect(), so wait for them briefly; one
+    # who arrives later is still recorded as the session's user.
+    try:
+        participant = await asyncio.wait_for(ctx.wait_for_participant(), USER_JOIN_TIMEOUT)
+        user_id = participant.identity
+    except asyncio.TimeoutError:
+        logging.warning("No participant joined in time; starting without history")
+        user_id = None
+
+    @ctx.room.on("participant_connected")
+    @with_log_context
+    def on_participant_connected(participant: rtc.RemoteParticipant):
+        nonlocal user_id
+        user_id = user_id or participant.identity
+
+    history_ctx = None
+    if user_id:
+        notes = format_history(await store.recent_sessions_async(user_id))
+        if notes:
+            history_ctx = ChatContext.empty()
+            history_ctx.add_message(
+                role="system",
+                content=f"Notes from this user's recent sessions:\n{notes}",
+            )
+
     await session.start(
         room=ctx.room,
-        agent=Assistant(),
+        agent=Assistant(
+            **components,
+            context_manager=context,
+            chat_ctx=history_ctx,
+            video_policy=video,
+            llm_hedge=llm_hedge,
+        ),
         room_input_options=RoomInputOptions(
             video_enabled=True,
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=providers.build("noise_cancellation"),
             close_on_disconnect=False,
         ),
     )
+    video.attach(session)
 
-    # Default startup: provide mental session instruction with global behavior applied
-    try:
-        await session.generate_reply(
-            instructions=GLOBAL_BEHAVIOR_INSTRUCTION + MENTAL_SESSION_INSTRUCTION
-        )
-    except Exception as e:
-        logging.error(f"Error sending initial session instruction: {e}")
+    # Default startup: greet with the scripted mental-session opener
+    scheduler.submit(lambda: speak_scripted("opener:mental"), key="opener")
 
     # ---------------------------
     # Graceful disconnect handling (save conversation)
     # ---------------------------
+    shutdown_task = None
+
     @ctx.room.on("disconnected")
+    @with_log_context
     def on_room_disconnected():
-        asyncio.create_task(handle_room_disconnected())
+        # Held here rather than on the scheduler, which this task shuts down.
+        nonlocal shutdown_task
+        if shutdown_task is None:
+            shutdown_task = asyncio.create_task(handle_room_disconnected())
+
+    def end_over_budget():
+        # save the conversation first, then release the job
+        on_room_disconnected()
+        shutdown_task.add_done_callback(
+            lambda _: ctx.shutdown(reason="job memory budget exceeded")
+        )
 
     async def handle_room_disconnected():
         try:
+            ingest.close()
+            await scheduler.aclose()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # try to build a readable room name; fallback to timestamp
-            try:
-                room_name = (
-                    message_data.get("from", {})
-                    .get("engine", {})
-                    .get("latestJoinResponse", {})
-                    .get("room", {})
-                    .get("name")
-                )
-                if not room_name:
-                    raise ValueError("no room name")
-            except Exception:
-                room_name = f"session_{timestamp}"
+            # set by the server; never taken from client data packets
+            room_name = ctx.job.room.name or "session"
+
+            await export_worker_metrics()
+            conv_file = await journal.close(
+                room_name,
+                timestamp,
+                extra={
+                    "user_id": user_id,
+                    "room": room_name,
+                    "turn_metrics": turn_timer.summary(),
+                    "endpointing": speculation.summary(),
+                    "scheduler": scheduler.stats,
+                    "data_ingest": ingest.stats,
+                    "tts_cache": audio_cache.stats if audio_cache else None,
+                    "video": video.stats,
+                    "capacity": job_monitor.stats,
+                    "providers": {**provider_monitor.summary(), "llm_hedge": llm_hedge.stats},
+                    "context_summary": {
+                        "summary": context.summary,
+                        "through_id": context.watermark_id,
+                        "stats": context.stats,
+                    },
+                },
+            )
 
-            conv_file = f"./conversations/{room_name}_{timestamp}.json"
-            with open(conv_file, "w", encoding="utf-8") as f:
-                json.dump(conversation, f, indent=2, ensure_ascii=False)
+            await store.import_file_async(conv_file)
+            # recommendations are produced later by `python recommendations.py run`
+            await asyncio.to_thread(enqueue_conversation, conv_file)
 
             logging.info(f"Session ended, data saved to {conv_file}.")
         except Exception as e:
@@ -296,13 +442,14 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 # ---------------------------
-# Logging setup and runner
+# Runner
 # ---------------------------
-logging.basicConfig(
-    filename="./logs/app.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(message)s",
-)
-
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    init_runtime()
+    recover_orphaned()  # conversations of job processes that crashed
+    preload_plugins()
+    agents.cli.run_app(
+        agents.WorkerOptions(
+            entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, **worker_options()
+        )
+    )
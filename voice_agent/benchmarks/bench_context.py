@@ -0,0 +1,102 @@
+"""Per-turn prompt tokens over a long session, unbounded vs. ContextManager.
+
+Replays a transcript (a saved ./conversations file, or a generated 200-turn
+corpus) and prints the prompt size each request would carry.
+
+    python benchmarks/bench_context.py --turns 200
+    python benchmarks/bench_context.py --file conversations/room_20250101.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_manager import ContextManager  # noqa: E402
+from instructions import estimate_tokens  # noqa: E402
+from prompts import AGENT_INSTRUCTION, GLOBAL_BEHAVIOR_INSTRUCTION  # noqa: E402
+
+USER_LINES = [
+    "I've been sleeping badly and work has been really stressful this week.",
+    "My shoulders feel tight after sitting at the desk all day.",
+    "I tried the breathing exercise yesterday and it helped a little.",
+    "Honestly I'm not sure what I want to focus on today.",
+]
+ASSISTANT_LINES = [
+    "It sounds like there's a lot weighing on you right now. What feels heaviest?",
+    "Let's take a second to roll the shoulders back slowly. How does that feel?",
+    "That's a great step forward. What did you notice while you were breathing?",
+    "That's completely okay. We can just check in and see what comes up.",
+]
+
+
+def generated_corpus(turns: int) -> list:
+    rng = random.Random(7)
+    records = []
+    for i in range(turns):
+        records.append({"id": f"u{i}", "role": "user", "text": rng.choice(USER_LINES)})
+        records.append(
+            {"id": f"a{i}", "role": "assistant", "text": rng.choice(ASSISTANT_LINES) * 2}
+        )
+    return records
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    records = data["conversation"] if isinstance(data, dict) else data
+    return [r for r in records if r.get("role") in ("user", "assistant") and r.get("text")]
+
+
+async def stub_summarizer(previous: str, records: list) -> str:
+    # Fixed-size stand-in for the LLM summary.
+    return (previous + " " + " ".join(r["text"][:20] for r in records))[-800:]
+
+
+async def replay(records: list, bounded: bool) -> list:
+    manager = ContextManager(summarizer=stub_summarizer)
+    head = [{"id": "sys", "text": GLOBAL_BEHAVIOR_INSTRUCTION + AGENT_INSTRUCTION}]
+    history = []
+    per_turn = []
+    for record in records:
+        history.append(record)
+        manager.add(record)
+        if record["role"] == "user":
+            if bounded:
+                manager.compact(
+                    head, history, lambda r: r["text"], lambda r: r.get("id")
+                )
+                per_turn.append(manager.stats["last_prompt_tokens"])
+            else:
+                per_turn.append(
+                    sum(estimate_tokens(r["text"]) for r in head + history)
+                )
+        elif manager.needs_summary():
+            # background summary completes between turns
+            await manager.summarize_pending()
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--file")
+    args = parser.parse_args()
+
+    records = load_corpus(args.file) if args.file else generated_corpus(args.turns)
+    unbounded = asyncio.run(replay(records, bounded=False))
+    bounded = asyncio.run(replay(records, bounded=True))
+
+    print(f"{'turn':>6} {'unbounded':>10} {'bounded':>8}")
+    checkpoints = sorted({1, 10, 25, 50, 100, 150, len(bounded)})
+    for turn in checkpoints:
+        if turn <= len(bounded):
+            print(f"{turn:>6} {unbounded[turn - 1]:>10} {bounded[turn - 1]:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Sustainable concurrent sessions per core, using the load-test stand-ins.
+
+Run from the voice_agent directory:
+
+    python benchmarks/bench_density.py
+    python benchmarks/bench_density.py --ladder 5,10,20,40,80 --time-scale 0.25
+
+Each rung runs loadtest/run.py in a fresh process (one process = one core,
+like a job process pool per core) with N concurrent sessions. A rung is
+sustainable when event-loop lag p99 stays under the lag budget and the
+process stays under the target CPU utilisation. Provider latencies are
+compressed by --time-scale, which multiplies event rate by 1/time-scale, so
+per-rung CPU is scaled back to real time before computing sessions/core.
+The result is a starting point for MINDFLEX_LOAD_THRESHOLD and for how many
+jobs a box of a given size should accept.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_rung(sessions: int, args) -> dict:
+    out = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(HERE, "loadtest", "run.py"),
+            "--sessions", str(sessions),
+            "--turns", str(args.turns),
+            "--time-scale", str(args.time_scale),
+            "--json",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ladder", default="5,10,20,40,80")
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--time-scale", type=float, default=0.25)
+    parser.add_argument("--lag-budget-ms", type=float, default=50.0)
+    parser.add_argument("--cpu-target", type=float, default=0.7)
+    args = parser.parse_args()
+
+    best = None
+    for sessions in (int(n) for n in args.ladder.split(",")):
+        r = run_rung(sessions, args)
+        # CPU at real-time pacing: same work spread over 1/time_scale as long
+        cpu_real = r["cpu_utilization"] * args.time_scale
+        cpu_per_session = cpu_real / sessions
+        ok = r["loop_lag_p99_ms"] < args.lag_budget_ms and r["cpu_utilization"] < 1.0
+        print(
+            f"{sessions:>4} sessions: lag p99={r['loop_lag_p99_ms']:6.1f}ms "
+            f"cpu={r['cpu_utilization'] * 100:5.1f}% (real-time {cpu_real * 100:5.1f}%) "
+            f"cpu/session={cpu_per_session * 100:.2f}% "
+            f"rss/session={r['rss_per_session_kb']:.0f}KiB {'ok' if ok else 'SATURATED'}"
+        )
+        if not ok:
+            break
+        best = (sessions, cpu_per_session, r)
+
+    if best is None:
+        print("No rung was sustainable; lower the ladder or raise --time-scale.")
+        return
+    sessions, cpu_per_session, _ = best
+    by_cpu = args.cpu_target / cpu_per_session if cpu_per_session else float("inf")
+    print(
+        f"\nSustainable: {sessions} sessions measured without lag; "
+        f"~{by_cpu:.0f} sessions/core at {args.cpu_target:.0%} CPU "
+        f"(stand-in providers; real plugins add their own per-session CPU)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Endpointing thresholds vs. cut-offs, response latency and wasted speculation.
+
+Run from the voice_agent directory (no network, no models):
+
+    python benchmarks/bench_endpointing.py
+    python benchmarks/bench_endpointing.py --fixtures recorded_turns.json
+    python benchmarks/bench_endpointing.py --write-fixtures synthetic.json
+
+Replays user turns as timelines of speech segments and pauses, each pause
+annotated with the turn detector's end-of-utterance probability, through the
+same decision livekit makes: after VAD end of speech, wait
+min_endpointing_delay if the probability is at or above the unlikely
+threshold, else max_endpointing_delay, and commit the turn unless the user
+resumes first. With preemptive generation the LLM request starts when the
+final transcript lands. For each setting it reports how often a user is cut
+off mid-turn, the median and p95 time from end of speech to first audio, and
+speculative requests wasted per turn.
+
+The sweep starts from the agent's own settings (endpointing_config(), so the
+MINDFLEX_*_ENDPOINTING_DELAY variables apply) and adds them to every axis of
+the grid. Each simulated reply goes through SpeculationTracker as
+speech_created / eou_metrics / llm_metrics events, so the wasted and saved
+figures are the ones the agent would report.
+
+Fixture format (JSON list of turns; the last segment's pause ends the turn):
+
+    [{"segments": [{"speech": 1.6, "pause": 0.7, "eou": 0.04},
+                   {"speech": 2.1, "pause": null, "eou": 0.93}]}]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from endpointing import SpeculationTracker, endpointing_config  # noqa: E402
+from turn_metrics import MetricSet  # noqa: E402
+
+# end of speech -> final transcript, LLM first token, TTS first audio
+STT_FINAL_DELAY = 0.25
+LLM_TTFT = 0.45
+TTS_TTFB = 0.15
+# the turn detector's own threshold is per language and ships with the model;
+# this stands in for it when MINDFLEX_EOU_UNLIKELY_THRESHOLD is unset
+MODEL_UNLIKELY = 0.1
+
+
+class _Speech:
+    # the parts of a livekit SpeechHandle that SpeculationTracker reads
+    def __init__(self, speech_id: str) -> None:
+        self.id = speech_id
+        self.scheduled = False
+        self._callbacks = []
+
+    def add_done_callback(self, callback) -> None:
+        self._callbacks.append(callback)
+
+    def finish(self, scheduled: bool) -> None:
+        self.scheduled = scheduled
+        for callback in self._callbacks:
+            callback(self)
+
+
+def synthetic_turns(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    turns = []
+    for _ in range(count):
+        segments = []
+        for _ in range(rng.choice((1, 1, 2, 2, 3))):
+            # mid-turn pause: usually short, sometimes a long "thinking" gap;
+            # the model is mostly confident the user isn't done, but a
+            # complete-sounding sentence can still fool it
+            pause = rng.lognormvariate(-0.9, 0.6)
+            eou = rng.uniform(0.3, 0.9) if rng.random() < 0.2 else rng.uniform(0.0, 0.1)
+            segments.append({"speech": rng.uniform(0.8, 3.0), "pause": pause, "eou": eou})
+        # end of turn: mostly confident, sometimes the user trails off
+        final_eou = rng.uniform(0.01, 0.2) if rng.random() < 0.15 else rng.uniform(0.4, 0.99)
+        segments[-1] = {**segments[-1], "pause": None, "eou": final_eou}
+        turns.append({"segments": segments})
+    return turns
+
+
+def replay(turns: list, min_delay: float, max_delay: float, unlikely: float, preemptive: bool) -> dict:
+    tracker = SpeculationTracker(MetricSet())
+    cutoffs, latencies = 0, []
+    clock = 0.0  # end of the current speech segment
+    for n, turn in enumerate(turns):
+        for i, seg in enumerate(turn["segments"]):
+            clock += seg["speech"]
+            wait = max(min_delay if seg["eou"] >= unlikely else max_delay, STT_FINAL_DELAY)
+            pause = seg["pause"]
+            speech = None
+            if preemptive and (pause is None or pause > STT_FINAL_DELAY):
+                # final transcript landed: the speculative reply starts
+                speech = _Speech(f"{n}.{i}")
+                tracker.on_speech_created(
+                    SimpleNamespace(
+                        speech_handle=speech, source="generate_reply", created_at=clock + STT_FINAL_DELAY
+                    )
+                )
+            if pause is not None and pause < wait:
+                # user resumed before the turn was committed
+                if speech is not None:
+                    speech.finish(scheduled=False)
+                clock += pause
+                continue
+            decided_at = clock + wait
+            if speech is None:
+                speech = _Speech(f"{n}.{i}")
+                tracker.on_speech_created(
+                    SimpleNamespace(speech_handle=speech, source="generate_reply", created_at=decided_at)
+                )
+            for metrics in (
+                SimpleNamespace(
+                    type="eou_metrics", speech_id=speech.id, timestamp=decided_at, on_user_turn_completed_delay=0.0
+                ),
+                SimpleNamespace(type="llm_metrics", speech_id=speech.id, ttft=LLM_TTFT),
+            ):
+                tracker.on_metrics_collected(SimpleNamespace(metrics=metrics))
+            speech.finish(scheduled=True)
+            clock += pause or 0.0
+            if pause is not None:
+                cutoffs += 1  # committed while the user still had more to say
+                break
+            head_start = wait - STT_FINAL_DELAY if preemptive else 0.0
+            latencies.append(wait + max(0.0, LLM_TTFT - head_start) + TTS_TTFB)
+        clock += 5.0  # the agent's reply and the next turn's start
+    latencies.sort()
+    summary = tracker.summary()
+    return {
+        "cutoff_rate": cutoffs / len(turns),
+        "latency_p50": statistics.median(latencies) if latencies else None,
+        "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        "wasted_per_turn": summary["speculative_wasted"] / len(turns),
+        "saved_mean_ms": summary["latency_saved_mean_ms"],
+    }
+
+
+def _row(label: str, r: dict) -> str:
+    saved = f"  saved {r['saved_mean_ms']:.0f}ms" if r["saved_mean_ms"] is not None else ""
+    return (
+        f"{label:>40}: cut-off {r['cutoff_rate']:6.1%}  "
+        f"latency p50 {r['latency_p50']:.2f}s p95 {r['latency_p95']:.2f}s  "
+        f"wasted/turn {r['wasted_per_turn']:.2f}{saved}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="JSON turn timelines (see module docstring)")
+    parser.add_argument("--write-fixtures", help="save the synthetic turns here and exit")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--min-delays", default="0.2,0.3,0.5,0.8")
+    parser.add_argument("--max-delays", default="1.5,2.0,3.0")
+    parser.add_argument("--unlikely", default="0.05,0.1,0.2")
+    parser.add_argument("--model-unlikely", type=float, default=MODEL_UNLIKELY)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        with open(args.fixtures, encoding="utf-8") as f:
+            turns = json.load(f)
+    else:
+        turns = synthetic_turns(args.turns, args.seed)
+    if args.write_fixtures:
+        with open(args.write_fixtures, "w", encoding="utf-8") as f:
+            json.dump(turns, f)
+        print(f"Wrote {len(turns)} turns to {args.write_fixtures}")
+        return
+
+    config = endpointing_config()
+    configured = (
+        config["min_endpointing_delay"],
+        config["max_endpointing_delay"],
+        config["unlikely_threshold"] if config["unlikely_threshold"] is not None else args.model_unlikely,
+    )
+
+    def axis(values: str, seed: float) -> list:
+        return sorted({float(v) for v in values.split(",")} | {seed})
+
+    grid = itertools.product(
+        axis(args.min_delays, configured[0]),
+        axis(args.max_delays, configured[1]),
+        axis(args.unlikely, configured[2]),
+    )
+    print(_row("VAD only (0.5s)", replay(turns, 0.5, 0.5, 0.0, preemptive=False)))
+    label = "configured min={} max={} unlikely={}".format(*configured)
+    print(_row(label + (" +pre" if config["preemptive_generation"] else ""),
+               replay(turns, *configured, preemptive=config["preemptive_generation"])))
+    for min_d, max_d, unlikely in grid:
+        for preemptive in (False, True):
+            r = replay(turns, min_d, max_d, unlikely, preemptive)
+            print(_row(f"min={min_d} max={max_d} unlikely={unlikely}{' +pre' if preemptive else ''}", r))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""First-byte latency and errors under provider faults, with and without failover.
+
+Run from the voice_agent directory (no API keys or network needed):
+
+    python benchmarks/bench_failover.py
+    python benchmarks/bench_failover.py --requests 60 --ttft-slo 1.0
+
+Starts the stand-in Gemini and Cartesia servers (loadtest/standins.py) on a
+local port and drives the real google and cartesia plugins at them through
+the same provider layer the agent uses (providers.py, failover.py). Each
+scenario injects latency spikes or errors into the primary model only; the
+secondary stays healthy. "single" uses the primary alone with the
+voice-tuned timeouts, "failover" adds the secondary model (LLM hedging,
+TTS FallbackAdapter).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "loadtest"))
+
+import providers  # noqa: E402
+from failover import LLMHedge, ProviderMonitor, with_fallback  # noqa: E402
+from standins import FaultProfile, StandIns  # noqa: E402
+from turn_metrics import MetricSet  # noqa: E402
+
+LLM_MODELS = ("gemini-2.5-flash", "gemini-2.5-flash-lite")
+TTS_MODELS = ("sonic-3", "sonic-2")
+
+SCENARIOS = {
+    "healthy": {},
+    "slow 20%": {"slow_rate": 0.2},
+    "errors 20%": {"error_rate": 0.2},
+    "outage": {"error_rate": 1.0},
+}
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def llm_turns(args, failover: bool) -> dict:
+    from livekit.agents import NOT_GIVEN, llm
+
+    metrics = MetricSet()
+    monitor = ProviderMonitor(metrics)
+    hedge = LLMHedge(
+        providers.build("llm"),
+        providers.build_fallback("llm") if failover else None,
+        ttft_slo=args.ttft_slo,
+        monitor=monitor,
+        worker_metrics=metrics,
+    )
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content="I've been feeling stressed about work.")
+    latencies, errors = [], 0
+    for _ in range(args.requests):
+        t0 = time.perf_counter()
+        try:
+            async for _chunk in hedge.chat(chat_ctx, [], NOT_GIVEN, providers.conn_options("llm")):
+                latencies.append(time.perf_counter() - t0)
+                break
+        except Exception:
+            errors += 1
+    return {"latencies": latencies, "errors": errors, **hedge.stats}
+
+
+async def tts_turns(args, failover: bool, http: aiohttp.ClientSession) -> dict:
+    metrics = MetricSet()
+    monitor = ProviderMonitor(metrics)
+    tts = with_fallback(
+        "tts",
+        providers.build("tts", http_session=http),
+        providers.build_fallback("tts", http_session=http) if failover else None,
+        monitor,
+    )
+    latencies, errors = [], 0
+    for _ in range(args.requests):
+        t0 = time.perf_counter()
+        try:
+            async with tts.stream(conn_options=providers.conn_options("tts")) as stream:
+                stream.push_text("Let's take a slow breath together.")
+                stream.end_input()
+                async for _audio in stream:
+                    latencies.append(time.perf_counter() - t0)
+                    break
+        except Exception:
+            errors += 1
+    return {"latencies": latencies, "errors": errors, **metrics.counters}
+
+
+def report(kind: str, scenario: str, mode: str, r: dict) -> None:
+    lat = r.pop("latencies")
+    errors = r.pop("errors")
+    extra = " ".join(f"{k}={v}" for k, v in r.items() if v and not k.endswith("requests"))
+    if lat:
+        print(
+            f"{kind} {scenario:>10} {mode:>8}: first byte p50={statistics.median(lat) * 1000:6.0f}ms "
+            f"p95={percentile(lat, 0.95) * 1000:6.0f}ms max={max(lat) * 1000:6.0f}ms "
+            f"errors={errors} {extra}"
+        )
+    else:
+        print(f"{kind} {scenario:>10} {mode:>8}: no successful requests, errors={errors} {extra}")
+
+
+async def main_async(args) -> None:
+    import logging
+
+    # the plugins log every injected fault with a traceback
+    logging.basicConfig(level=logging.CRITICAL)
+    os.environ.setdefault("GOOGLE_API_KEY", "stand-in")
+    os.environ.setdefault("CARTESIA_API_KEY", "stand-in")
+    os.environ["MINDFLEX_TTS_TIMEOUT"] = str(args.tts_timeout)
+    os.environ["MINDFLEX_TTS_FALLBACK_MODEL"] = TTS_MODELS[1]
+    os.environ["MINDFLEX_LLM_FALLBACK_MODEL"] = LLM_MODELS[1]
+    for name, faults in SCENARIOS.items():
+        for mode in ("single", "failover"):
+            profiles = {}
+            for primary, secondary in (LLM_MODELS, TTS_MODELS):
+                profiles[primary] = FaultProfile(
+                    first_byte=args.first_byte, slow_first_byte=args.slow_first_byte, seed=args.seed, **faults
+                )
+                profiles[secondary] = FaultProfile(first_byte=args.first_byte, seed=args.seed)
+            standins = StandIns(profiles)
+            url = await standins.start()
+            os.environ["MINDFLEX_GEMINI_BASE_URL"] = url
+            os.environ["MINDFLEX_CARTESIA_BASE_URL"] = url
+            try:
+                report("LLM", name, mode, await llm_turns(args, mode == "failover"))
+                async with aiohttp.ClientSession() as http:
+                    report("TTS", name, mode, await tts_turns(args, mode == "failover", http))
+            finally:
+                await standins.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--first-byte", type=float, default=0.3)
+    parser.add_argument("--slow-first-byte", type=float, default=4.0)
+    parser.add_argument("--ttft-slo", type=float, default=1.5)
+    parser.add_argument("--tts-timeout", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Event-loop stall per logged turn: synchronous logging + prints vs. the
+queue-backed pipeline in log_setup.
+
+    python benchmarks/bench_logging.py --turns 2000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_setup  # noqa: E402
+
+TRANSCRIPT = "I've been feeling a bit stressed about work lately, can we talk?"
+REPLY = "It sounds like there's a lot weighing on you right now. " * 4
+
+
+def turn_before():
+    # Mirrors the handlers prior to the logging pipeline.
+    logging.info(f"USER(None): {TRANSCRIPT} (lang=en, final=True)")
+    print(f"USER(None): {TRANSCRIPT}")
+    print(f"Conversation item added from assistant: {REPLY}. interrupted: False")
+    for part in (REPLY, REPLY):
+        print(f" - text: {part}")
+    logging.info(f"ASSISTANT(item_1): {REPLY} (interrupted=False)")
+
+
+def turn_after():
+    debug_log = log_setup.debug_log
+    logging.info(f"USER(None): {TRANSCRIPT} (lang=en, final=True)")
+    debug_log.debug(f"USER(None): {TRANSCRIPT}")
+    if debug_log.isEnabledFor(logging.DEBUG):
+        debug_log.debug(f"Conversation item added from assistant: {REPLY}.")
+        for part in (REPLY, REPLY):
+            debug_log.debug(f" - text: {part}")
+    logging.info(f"ASSISTANT(item_1): {REPLY} (interrupted=False)")
+
+
+async def measure(turn, turns: int) -> list:
+    stalls = []
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        turn()
+        stalls.append(time.perf_counter() - t0)
+        await asyncio.sleep(0)
+    return stalls
+
+
+def report(name: str, stalls: list):
+    stalls = sorted(stalls)
+    p99 = stalls[int(len(stalls) * 0.99) - 1]
+    print(
+        f"{name:>7}: mean={statistics.mean(stalls) * 1e6:.1f}us "
+        f"p99={p99 * 1e6:.1f}us per turn"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    root = logging.getLogger()
+
+    # Before: basicConfig file handler + prints, all on the loop thread.
+    logging.basicConfig(
+        filename=os.path.join(tmp, "before.log"),
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    with open(os.path.join(tmp, "stdout.txt"), "w") as out:
+        with contextlib.redirect_stdout(out):
+            before = asyncio.run(measure(turn_before, args.turns))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    # After: enqueue only; the listener thread formats and writes.
+    log_setup.setup_logging(log_dir=tmp)
+    after = asyncio.run(measure(turn_after, args.turns))
+    log_setup.shutdown_logging()
+
+    report("before", before)
+    report("after", after)
+
+
+if __name__ == "__main__":
+    main()
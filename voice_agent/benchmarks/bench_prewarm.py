@@ -0,0 +1,72 @@
+"""Time-to-first-greeting and per-job RSS, with and without worker prewarm.
+
+Run from the voice_agent directory (provider API keys must be set, but no
+network calls are made):
+
+    python benchmarks/bench_prewarm.py --jobs 10
+
+"Time to first greeting" here is the setup a job does before it can call
+`generate_reply` for the opener (VAD load + client construction + Assistant);
+the provider round trip itself is the same in both modes and is excluded.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent  # noqa: E402
+
+
+def run_job(proc) -> float:
+    t0 = time.perf_counter()
+    agent.Assistant(**agent.get_components(proc))
+    return time.perf_counter() - t0
+
+
+def bench(jobs: int, use_prewarm: bool) -> dict:
+    process = psutil.Process()
+    setup_times = []
+    rss_deltas = []
+
+    # Prewarm happens while the process is idle, before any job is assigned.
+    warm_proc = SimpleNamespace(userdata={})
+    if use_prewarm:
+        agent.prewarm(warm_proc)
+
+    for _ in range(jobs):
+        # Without prewarm every job starts from an empty process state.
+        proc = warm_proc if use_prewarm else SimpleNamespace(userdata={})
+        rss_before = process.memory_info().rss
+        setup_times.append(run_job(proc))
+        rss_deltas.append(process.memory_info().rss - rss_before)
+
+    return {
+        "mode": "prewarm" if use_prewarm else "cold",
+        "p50_ms": statistics.median(setup_times) * 1000,
+        "max_ms": max(setup_times) * 1000,
+        "rss_per_job_kb": statistics.mean(rss_deltas) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=10)
+    args = parser.parse_args()
+
+    for use_prewarm in (False, True):
+        r = bench(args.jobs, use_prewarm)
+        print(
+            f"{r['mode']:>8}: first-greeting setup p50={r['p50_ms']:.1f}ms "
+            f"max={r['max_ms']:.1f}ms, rss/job={r['rss_per_job_kb']:.0f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Job process cold start: spawn -> import agent -> init -> prewarm -> ready.
+
+Run from the voice_agent directory (no API keys or network needed):
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --top 15
+    python benchmarks/bench_startup.py --real     # configured plugins, keys required
+
+Each run is a fresh interpreter, like a newly spawned job process. STT, TTS,
+LLM and VAD are registered as stand-ins (providers.register) so the numbers
+measure our own startup path rather than model loads; --real builds the
+configured providers instead. The `-X importtime` breakdown lists what
+`import agent` spends its time on, grouped by top-level package. Provider
+plugins must not be imported by `import agent` itself; each run reports any
+that were (tests/test_startup.py runs the stubbed path and asserts none).
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, os, sys, time
+from types import SimpleNamespace
+t0 = time.perf_counter()
+sys.path.insert(0, {here!r})
+import agent
+t1 = time.perf_counter()
+plugins = sorted(m for m in sys.modules if m.startswith("livekit.plugins."))
+agent.init_runtime()
+t2 = time.perf_counter()
+if not {real!r}:
+    import providers
+    for kind in ("vad", "stt", "tts", "llm"):
+        providers.register(kind, "stub", lambda **kw: SimpleNamespace(**kw))
+        os.environ["MINDFLEX_" + kind.upper()] = "stub"
+    os.environ["MINDFLEX_NOISE_CANCELLATION"] = "none"
+    os.environ["MINDFLEX_TURN_DETECTOR"] = "vad"
+proc = SimpleNamespace(userdata={{}})
+agent.prewarm(proc)
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import": t1 - t0, "init": t2 - t1, "prewarm": t3 - t2,
+    "plugins_at_import": plugins, "prewarmed": sorted(proc.userdata),
+}}))
+"""
+
+
+def run_once(real: bool, workdir: str) -> dict:
+    code = CHILD.format(here=HERE, real=real)
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=workdir
+    )
+    total = time.perf_counter() - t0
+    return {"total": total, **json.loads(out.stdout.splitlines()[-1])}
+
+
+def import_breakdown(top: int, workdir: str) -> list:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {HERE!r}); import agent"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=workdir,
+    )
+    # self time per top-level package
+    by_package: dict[str, int] = {}
+    for line in out.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)", line)
+        if m:
+            name = m.group(2)
+            package = ".".join(name.split(".")[:3]) if name.startswith("livekit.") else name.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + int(m.group(1))
+    return sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--real", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mindflex-startup-")
+    runs = [run_once(args.real, workdir) for _ in range(args.runs)]
+    if runs[0]["plugins_at_import"]:
+        print(f"plugins imported by `import agent`: {', '.join(runs[0]['plugins_at_import'])}")
+    for phase in ("import", "init", "prewarm", "total"):
+        values = [r[phase] for r in runs]
+        print(
+            f"{phase:>8}: p50={statistics.median(values) * 1000:7.1f}ms "
+            f"max={max(values) * 1000:7.1f}ms"
+        )
+    print(f"\n`import agent` self time by package (top {args.top}):")
+    for package, us in import_breakdown(args.top, workdir):
+        print(f"  {us / 1000:8.1f}ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
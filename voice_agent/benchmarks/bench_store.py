@@ -0,0 +1,106 @@
+"""Conversation store at scale: bulk load N sessions, then time the
+session-start history lookup and full-text search.
+
+    python benchmarks/bench_store.py --sessions 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_store import ConversationStore  # noqa: E402
+
+PHRASES = [
+    "I have been sleeping badly",
+    "work has been stressful",
+    "my shoulders are tight",
+    "the breathing exercise helped",
+    "I went for a walk this morning",
+    "I feel anxious before meetings",
+    "let's try a stretch",
+    "journaling has been useful",
+]
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    path = os.path.join(tempfile.mkdtemp(), "store.db")
+    store = ConversationStore(path)
+
+    t0 = time.perf_counter()
+    now = time.time()
+    for i in range(args.sessions):
+        start = now - rng.uniform(0, 365 * 86400)
+        store.save_session(
+            {
+                "user_id": f"user_{rng.randrange(args.users)}",
+                "room": f"room_{i}",
+                "started_at": start,
+                "ended_at": start + 900,
+                "summary": None,
+                "records": [
+                    {
+                        "role": "user" if t % 2 == 0 else "assistant",
+                        "text": rng.choice(PHRASES),
+                        "created_at": start + t * 10,
+                    }
+                    for t in range(args.turns)
+                ],
+            }
+        )
+    load_s = time.perf_counter() - t0
+
+    recent = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        store.recent_sessions(f"user_{rng.randrange(args.users)}", k=3)
+        recent.append(time.perf_counter() - t0)
+
+    search = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        store.search("breathing", user_id=f"user_{rng.randrange(args.users)}")
+        search.append(time.perf_counter() - t0)
+
+    corpus_search = []
+    for _ in range(20):
+        t0 = time.perf_counter()
+        store.search(rng.choice(["breathing", "shoulders", "anxious meetings"]))
+        corpus_search.append(time.perf_counter() - t0)
+
+    store.close()
+    print(f"loaded {args.sessions} sessions in {load_s:.1f}s ({os.path.getsize(path) / 1e6:.0f}MB)")
+    print(
+        f"recent_sessions(k=3): p50={statistics.median(recent) * 1000:.2f}ms "
+        f"p99={percentile(recent, 0.99) * 1000:.2f}ms"
+    )
+    print(
+        f"search(user):         p50={statistics.median(search) * 1000:.2f}ms "
+        f"p99={percentile(search, 0.99) * 1000:.2f}ms"
+    )
+    print(
+        f"search(all, top 20):  p50={statistics.median(corpus_search) * 1000:.2f}ms "
+        f"p99={percentile(corpus_search, 0.99) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Tone classifier micro-benchmark: the previous substring detector vs. the
+compiled word-boundary classifier in tone.py.
+
+    python benchmarks/bench_tone.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tone  # noqa: E402
+
+
+def detect_sentiment_hint(text: str) -> str:
+    # The detector previously inlined in agent.py, kept for comparison.
+    lower = text.lower()
+    low_words = [
+        "tired",
+        "tire",
+        "stressed",
+        "stressing",
+        "sad",
+        "anxious",
+        "worried",
+        "down",
+        "depressed",
+        "overwhelmed",
+    ]
+    high_words = ["good", "great", "energized", "happy", "awesome", "fine", "well"]
+    if any(w in lower for w in low_words):
+        return "low"
+    if any(w in lower for w in high_words):
+        return "high"
+    return "neutral"
+
+
+MESSAGES = [
+    "hello?",
+    "I feel a bit tired today",
+    "Honestly I'm doing great, had a good run this morning",
+    "can you hear me",
+    "I'm not good, work has been overwhelming and I can't sleep",
+    "downloading the app on my phone now",
+    "farewell for today, thanks",
+    "I've been thinking about what you said yesterday about breathing " * 3,
+]
+
+
+def main():
+    n = 20000
+    legacy = timeit.timeit(
+        lambda: [detect_sentiment_hint(m) for m in MESSAGES], number=n
+    )
+    compiled = timeit.timeit(lambda: [tone.classify(m) for m in MESSAGES], number=n)
+    batch = timeit.timeit(lambda: tone.classify_batch(MESSAGES), number=n)
+    per = n * len(MESSAGES)
+    print(f"  legacy: {legacy / per * 1e6:.2f}us/message")
+    print(f"compiled: {compiled / per * 1e6:.2f}us/message")
+    print(f"   batch: {batch / per * 1e6:.2f}us/message")
+    print()
+    for m in MESSAGES:
+        print(f"{detect_sentiment_hint(m):>8} -> {tone.classify(m):<8} {m[:50]!r}")
+
+
+if __name__ == "__main__":
+    main()
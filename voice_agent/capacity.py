@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import psutil
+
+from providers import env_number
+
+
+# ---------------------------
+# Worker capacity management
+# ---------------------------
+# Each job process runs a JobMonitor that samples its own event-loop lag,
+# CPU and RSS and publishes them as a small heartbeat file. The worker's
+# load_fnc (WorkerLoad) reads the heartbeats of its active jobs and reports
+# how full the box is: the highest of CPU, memory and loop-lag pressure,
+# projected one job ahead so the worker stops taking jobs *before* the next
+# one would degrade everyone else.
+#
+# Tunables (environment):
+#   MINDFLEX_LOAD_THRESHOLD       worker marked unavailable above this (0.7)
+#   MINDFLEX_NUM_IDLE_PROCESSES   pre-spawned, prewarmed job processes
+#   MINDFLEX_JOB_MEMORY_WARN_MB   livekit logs a warning above this (500)
+#   MINDFLEX_JOB_MEMORY_LIMIT_MB  livekit kills the job above this (0 = off);
+#                                 the job ends itself gracefully at 90% of it
+#   MINDFLEX_LOOP_LAG_BUDGET_MS   loop lag treated as full load (50)
+HEARTBEAT_DIR = "./metrics/jobs"
+HEARTBEAT_STALE_S = 10.0
+SOFT_LIMIT_FRACTION = 0.9
+# per-job estimates used until a job has reported a sample
+DEFAULT_JOB_CPU_PERCENT = 10.0
+DEFAULT_JOB_RSS_MB = 150.0
+
+
+def worker_options() -> dict:
+    # Extra agents.WorkerOptions fields, from the environment.
+    opts = {
+        "load_fnc": WorkerLoad(),
+        "load_threshold": env_number("MINDFLEX_LOAD_THRESHOLD", 0.7),
+        "job_memory_warn_mb": env_number("MINDFLEX_JOB_MEMORY_WARN_MB", 500),
+        "job_memory_limit_mb": env_number("MINDFLEX_JOB_MEMORY_LIMIT_MB", 0),
+    }
+    idle = env_number("MINDFLEX_NUM_IDLE_PROCESSES", None, int)
+    if idle is not None:
+        # unset keeps livekit's default (0 in dev, min(cores, 4) in prod)
+        opts["num_idle_processes"] = idle
+    return opts
+
+
+# ---------------------------
+# Job side
+# ---------------------------
+class JobMonitor:
+    def __init__(
+        self,
+        job_id: str,
+        on_over_budget=None,
+        interval: float = 0.5,
+        publish_every: int = 4,
+        directory: str = HEARTBEAT_DIR,
+    ) -> None:
+        # `on_over_budget()` is called once when RSS crosses the soft limit.
+        self.job_id = job_id
+        self.on_over_budget = on_over_budget
+        self.interval = interval
+        self.publish_every = publish_every
+        self.path = os.path.join(directory, f"{job_id}.json")
+        limit_mb = env_number("MINDFLEX_JOB_MEMORY_LIMIT_MB", 0)
+        self.soft_limit_mb = limit_mb * SOFT_LIMIT_FRACTION if limit_mb > 0 else None
+        self._process = psutil.Process()
+        self._lags: list[float] = []
+        self._tripped = False
+        self.stats = {"loop_lag_max_ms": 0.0, "rss_peak_mb": 0.0, "over_budget": False}
+
+    async def run(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._process.cpu_percent(None)  # prime the CPU counter
+        loop = asyncio.get_running_loop()
+        ticks = 0
+        try:
+            while True:
+                t0 = loop.time()
+                await asyncio.sleep(self.interval)
+                self._lags.append(max(0.0, loop.time() - t0 - self.interval))
+                ticks += 1
+                if ticks % self.publish_every == 0:
+                    beat = await asyncio.to_thread(self._publish)
+                    self._check_budget(beat)
+        finally:
+            self.remove()
+
+    def sample(self) -> dict:
+        lags, self._lags = self._lags, []
+        rss_mb = self._process.memory_info().rss / (1024 * 1024)
+        lag_ms = max(lags, default=0.0) * 1000
+        self.stats["loop_lag_max_ms"] = max(self.stats["loop_lag_max_ms"], lag_ms)
+        self.stats["rss_peak_mb"] = max(self.stats["rss_peak_mb"], rss_mb)
+        return {
+            "job_id": self.job_id,
+            "pid": os.getpid(),
+            "updated_at": time.time(),
+            "cpu_percent": self._process.cpu_percent(None),
+            "rss_mb": rss_mb,
+            "loop_lag_ms": lag_ms,
+        }
+
+    def _publish(self) -> dict:
+        beat = self.sample()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(beat, f)
+        os.replace(tmp, self.path)
+        return beat
+
+    def _check_budget(self, beat: dict) -> None:
+        if self.soft_limit_mb and beat["rss_mb"] > self.soft_limit_mb and not self._tripped:
+            self._tripped = True
+            self.stats["over_budget"] = True
+            logging.warning(
+                f"Job {self.job_id} at {beat['rss_mb']:.0f}MB exceeds its "
+                f"{self.soft_limit_mb:.0f}MB budget; ending the session"
+            )
+            if self.on_over_budget is not None:
+                self.on_over_budget()
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+def read_heartbeats(job_ids, directory: str = HEARTBEAT_DIR) -> list:
+    now = time.time()
+    beats = []
+    for job_id in job_ids:
+        try:
+            with open(os.path.join(directory, f"{job_id}.json"), encoding="utf-8") as f:
+                beat = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - beat.get("updated_at", 0) < HEARTBEAT_STALE_S:
+            beats.append(beat)
+    return beats
+
+
+class WorkerLoad:
+    # agents.WorkerOptions.load_fnc; called from a thread every ~0.5s.
+    def __init__(self, directory: str = HEARTBEAT_DIR) -> None:
+        self.directory = directory
+        self.cores = psutil.cpu_count() or 1
+        self.lag_budget_ms = env_number("MINDFLEX_LOOP_LAG_BUDGET_MS", 50)
+        self.last = {}
+        psutil.cpu_percent(None)  # prime the system CPU counter
+
+    def __call__(self, worker) -> float:
+        job_ids = [j.job.id for j in worker.active_jobs]
+        return self.compute(job_ids)
+
+    def compute(self, job_ids: list) -> float:
+        beats = read_heartbeats(job_ids, self.directory)
+        n = len(job_ids)
+        cpu_per_job = (
+            sum(b["cpu_percent"] for b in beats) / len(beats) if beats else DEFAULT_JOB_CPU_PERCENT
+        )
+        rss_per_job = sum(b["rss_mb"] for b in beats) / len(beats) if beats else DEFAULT_JOB_RSS_MB
+        vm = psutil.virtual_memory()
+
+        # projected with one more job, so a "yes" still leaves headroom
+        cpu = max(psutil.cpu_percent(None) / 100, (n + 1) * cpu_per_job / (100 * self.cores))
+        memory = max(vm.percent / 100, (n + 1) * rss_per_job * 1024 * 1024 / vm.total)
+        worst_lag = max((b["loop_lag_ms"] for b in beats), default=0.0)
+        lag = worst_lag / self.lag_budget_ms
+
+        self.last = {
+            "jobs": n,
+            "cpu": cpu,
+            "memory": memory,
+            "loop_lag": lag,
+            "cpu_per_job": cpu_per_job,
+            "rss_per_job_mb": rss_per_job,
+        }
+        return min(1.0, max(cpu, memory, lag))
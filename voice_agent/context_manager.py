@@ -0,0 +1,161 @@
+import logging
+from collections import deque
+
+from instructions import estimate_tokens
+
+
+# ---------------------------
+# Bounded chat context with rolling summarization
+# ---------------------------
+# The last `keep_turns` user/assistant turns are sent verbatim; anything older
+# is folded into a rolling summary. Summaries are produced in the background
+# between turns from the same conversation records the journal stores, so
+# the reply path only ever reads the current summary and never waits on it.
+# A hard token budget is applied last, per request.
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a wellness conversation between a user "
+    "and MindFlex. Update the summary with the new turns. Keep what matters "
+    "for continuity: the user's state and concerns, goals, exercises tried, "
+    "preferences and consent given (e.g. camera use). Be concise, third "
+    "person, under 200 words."
+)
+
+
+class ContextManager:
+    def __init__(
+        self,
+        keep_turns: int = 8,
+        token_budget: int = 6000,
+        summarize_batch: int = 4,
+        summarizer=None,
+    ) -> None:
+        # `summarizer(previous_summary, records) -> str` (async)
+        self.keep_items = keep_turns * 2
+        self.token_budget = token_budget
+        self.summarize_batch = summarize_batch
+        self.summary = ""
+        # id of the last record folded into the summary
+        self.watermark_id = None
+        self._summarizer = summarizer
+        self._window = deque()
+        self._pending = deque()
+        self._summarizing = False
+        self.stats = {
+            "summaries": 0,
+            "summarized_records": 0,
+            "summary_failures": 0,
+            "budget_evictions": 0,
+            "last_prompt_tokens": 0,
+        }
+
+    # ---------------------------
+    # Record intake (conversation_item_added)
+    # ---------------------------
+    def add(self, record: dict) -> None:
+        if record.get("role") not in ("user", "assistant") or not record.get("text"):
+            return
+        self._window.append(record)
+        while len(self._window) > self.keep_items:
+            self._pending.append(self._window.popleft())
+
+    def needs_summary(self) -> bool:
+        return (
+            self._summarizer is not None
+            and not self._summarizing
+            and len(self._pending) >= self.summarize_batch
+        )
+
+    async def summarize_pending(self) -> None:
+        # Run as a background task after a turn, never from llm_node.
+        if not self.needs_summary():
+            return
+        self._summarizing = True
+        batch = list(self._pending)
+        try:
+            summary = await self._summarizer(self.summary, batch)
+            if summary:
+                self.summary = summary
+                self.watermark_id = batch[-1].get("id")
+                for _ in batch:
+                    self._pending.popleft()
+                self.stats["summaries"] += 1
+                self.stats["summarized_records"] += len(batch)
+        except Exception as e:
+            self.stats["summary_failures"] += 1
+            logging.error(f"Context summarization failed: {e}")
+        finally:
+            self._summarizing = False
+
+    # ---------------------------
+    # Request-time compaction
+    # ---------------------------
+    def compact(self, head: list, convo: list, text_of, id_of) -> tuple:
+        # `head` is the system/instruction items, `convo` everything else in
+        # order. Returns (head, summary_text, kept_convo).
+        if self.watermark_id is not None:
+            for i, item in enumerate(convo):
+                if id_of(item) == self.watermark_id:
+                    convo = convo[i + 1 :]
+                    break
+
+        fixed = sum(estimate_tokens(text_of(item)) for item in head)
+        fixed += estimate_tokens(self.summary)
+        sizes = [estimate_tokens(text_of(item)) for item in convo]
+        total = fixed + sum(sizes)
+        start = 0
+        # always keep the latest exchange, even over budget
+        while total > self.token_budget and len(convo) - start > 2:
+            total -= sizes[start]
+            start += 1
+            self.stats["budget_evictions"] += 1
+
+        self.stats["last_prompt_tokens"] = total
+        return head, self.summary, convo[start:]
+
+    def trim_chat_ctx(self, chat_ctx):
+        from livekit.agents import llm
+
+        head, convo = [], []
+        for item in chat_ctx.items:
+            if getattr(item, "role", None) in ("system", "developer"):
+                head.append(item)
+            else:
+                convo.append(item)
+
+        head, summary, convo = self.compact(
+            head,
+            convo,
+            text_of=lambda item: getattr(item, "text_content", None) or "",
+            id_of=lambda item: getattr(item, "id", None),
+        )
+        items = list(head)
+        if summary:
+            items.append(
+                llm.ChatMessage(
+                    role="system",
+                    content=[f"Summary of the conversation so far:\n{summary}"],
+                )
+            )
+        items.extend(convo)
+        return llm.ChatContext(items)
+
+
+def llm_summarizer(llm_instance):
+    async def summarize(previous: str, records: list) -> str:
+        from livekit.agents import llm
+
+        turns = "\n".join(f"{r['role']}: {r['text']}" for r in records)
+        ctx = llm.ChatContext.empty()
+        ctx.add_message(role="system", content=SUMMARY_PROMPT)
+        ctx.add_message(
+            role="user",
+            content=f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{turns}",
+        )
+        parts = []
+        async with llm_instance.chat(chat_ctx=ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        return "".join(parts).strip()
+
+    return summarize
@@ -0,0 +1,276 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ---------------------------
+# Indexed conversation store
+# ---------------------------
+# SQLite (WAL) with one row per session, one per turn, and an FTS5 index over
+# turn text. Sessions are indexed by user, room and start time so "last K
+# sessions for this user" is a single index range scan. All access goes
+# through one worker thread; the async API never touches sqlite on the event
+# loop. The sync API (importer, benchmarks) may be called from any thread.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT,
+    room TEXT,
+    started_at REAL,
+    ended_at REAL,
+    turn_count INTEGER,
+    summary TEXT,
+    source_file TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS sessions_user_time ON sessions (user_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS sessions_room_time ON sessions (room, started_at DESC);
+CREATE INDEX IF NOT EXISTS sessions_time ON sessions (started_at);
+
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    idx INTEGER,
+    role TEXT,
+    text TEXT,
+    created_at REAL,
+    interrupted INTEGER
+);
+CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, idx);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5 (
+    text, content='turns', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_ad AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts (turns_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# <room>_<YYYYmmdd>_<HHMMSS>.json, as written by the journal
+_FILE_RE = re.compile(r"^(?P<room>.+)_(?P<ts>\d{8}_\d{6})\.json$")
+
+
+def parse_conversation_file(path: str) -> dict:
+    # Accepts both the legacy JSON-array files and the current
+    # {"conversation": [...], ...} layout.
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    meta = data if isinstance(data, dict) else {}
+    records = data.get("conversation", []) if isinstance(data, dict) else data
+
+    m = _FILE_RE.match(os.path.basename(path))
+    file_time = (
+        time.mktime(time.strptime(m.group("ts"), "%Y%m%d_%H%M%S")) if m else None
+    )
+    times = [r["created_at"] for r in records if isinstance(r.get("created_at"), (int, float))]
+    summary = (meta.get("context_summary") or {}).get("summary") or None
+    return {
+        "user_id": meta.get("user_id"),
+        "room": meta.get("room") or (m.group("room") if m else None),
+        "started_at": min(times) if times else file_time,
+        "ended_at": max(times) if times else file_time,
+        "summary": summary,
+        "records": [
+            r for r in records if r.get("role") in ("user", "assistant") and r.get("text")
+        ],
+    }
+
+
+def _fts_query(text: str) -> str:
+    # User text is not FTS5 syntax ("don't" is a syntax error): match each
+    # word as a quoted term, all of them required.
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+
+class ConversationStore:
+    def __init__(self, path: str = "./conversations/store.db") -> None:
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="convstore")
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    # ---------------------------
+    # Sync API
+    # ---------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def save_session(self, session: dict, source_file: str | None = None) -> int | None:
+        # Idempotent per source file: re-importing replaces the old rows.
+        with self._lock, self._connection() as conn:
+            if source_file:
+                conn.execute("DELETE FROM sessions WHERE source_file = ?", (source_file,))
+            cur = conn.execute(
+                "INSERT INTO sessions (user_id, room, started_at, ended_at, turn_count,"
+                " summary, source_file) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.get("user_id"),
+                    session.get("room"),
+                    session.get("started_at"),
+                    session.get("ended_at"),
+                    len(session["records"]),
+                    session.get("summary"),
+                    source_file,
+                ),
+            )
+            session_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO turns (session_id, idx, role, text, created_at, interrupted)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        i,
+                        r["role"],
+                        r["text"],
+                        r.get("created_at"),
+                        1 if r.get("interrupted") else 0,
+                    )
+                    for i, r in enumerate(session["records"])
+                ],
+            )
+        return session_id
+
+    def import_file(self, path: str, **overrides) -> int | None:
+        session = parse_conversation_file(path)
+        session.update({k: v for k, v in overrides.items() if v is not None})
+        return self.save_session(session, source_file=os.path.abspath(path))
+
+    def import_directory(self, directory: str) -> int:
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            try:
+                self.import_file(path)
+                imported += 1
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Skipping {path}: {e}")
+        return imported
+
+    def recent_sessions(self, user_id: str, k: int = 3, last_turns: int = 6) -> list:
+        with self._lock:
+            return self._recent_sessions(self._connection(), user_id, k, last_turns)
+
+    @staticmethod
+    def _recent_sessions(conn, user_id: str, k: int, last_turns: int) -> list:
+        sessions = [
+            dict(row)
+            for row in conn.execute(
+                "SELECT id, room, started_at, ended_at, turn_count, summary FROM sessions"
+                " WHERE user_id = ? ORDER BY started_at DESC LIMIT ?",
+                (user_id, k),
+            )
+        ]
+        for s in sessions:
+            rows = conn.execute(
+                "SELECT role, text FROM turns WHERE session_id = ?"
+                " ORDER BY idx DESC LIMIT ?",
+                (s["id"], last_turns),
+            ).fetchall()
+            s["last_turns"] = [dict(r) for r in reversed(rows)]
+        return sessions
+
+    def search(self, query: str, user_id: str | None = None, limit: int = 20) -> list:
+        query = _fts_query(query)
+        if not query:
+            return []
+        if user_id is None:
+            # corpus-wide: let FTS drive and rank
+            sql = (
+                "SELECT s.id AS session_id, s.user_id, s.room, s.started_at, t.role, t.text"
+                " FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid"
+                " JOIN sessions s ON s.id = t.session_id WHERE turns_fts MATCH ?"
+                " ORDER BY rank LIMIT ?"
+            )
+            params = (query, limit)
+        else:
+            # per-user: walk the user's (few) turns via the index and probe FTS
+            # by rowid, instead of ranking every match in the corpus
+            sql = (
+                "SELECT s.id AS session_id, s.user_id, s.room, s.started_at, t.role, t.text"
+                " FROM sessions s JOIN turns t ON t.session_id = s.id"
+                " WHERE s.user_id = ? AND EXISTS (SELECT 1 FROM turns_fts"
+                " WHERE turns_fts MATCH ? AND turns_fts.rowid = t.id)"
+                " ORDER BY s.started_at DESC, t.idx LIMIT ?"
+            )
+            params = (user_id, query, limit)
+        with self._lock:
+            return [dict(row) for row in self._connection().execute(sql, params)]
+
+    # ---------------------------
+    # Async API
+    # ---------------------------
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    async def recent_sessions_async(
+        self, user_id: str, k: int = 3, budget: float = 0.15
+    ) -> list:
+        # Session start can't wait on history: past the budget, start without it.
+        try:
+            return await asyncio.wait_for(
+                self._run(self.recent_sessions, user_id, k), timeout=budget
+            )
+        except asyncio.TimeoutError:
+            logging.warning(f"History lookup for {user_id} exceeded {budget * 1000:.0f}ms")
+            return []
+        except sqlite3.Error as e:
+            logging.error(f"History lookup failed: {e}")
+            return []
+
+    async def search_async(self, query: str, user_id: str | None = None, limit: int = 20):
+        return await self._run(self.search, query, user_id, limit)
+
+    async def import_file_async(self, path: str, **overrides):
+        return await self._run(self.import_file, path, **overrides)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def format_history(sessions: list) -> str:
+    # Compact notes for the LLM from recent_sessions() output.
+    lines = []
+    for s in sessions:
+        when = time.strftime("%Y-%m-%d", time.localtime(s["started_at"])) if s["started_at"] else "earlier"
+        if s.get("summary"):
+            lines.append(f"- {when}: {s['summary']}")
+        elif s.get("last_turns"):
+            said = " / ".join(t["text"][:120] for t in s["last_turns"] if t["role"] == "user")
+            if said:
+                lines.append(f"- {when}: the user said: {said}")
+    return "\n".join(lines)
+
+
+# python conversation_store.py import ./conversations
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "import":
+        print("usage: python conversation_store.py import <conversations dir>")
+        sys.exit(2)
+    store = ConversationStore(os.path.join(sys.argv[2], "store.db"))
+    count = store.import_directory(sys.argv[2])
+    store.close()
+    print(f"Imported {count} conversation file(s)")
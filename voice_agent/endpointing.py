@@ -0,0 +1,144 @@
+import importlib
+import logging
+import os
+import time
+
+from providers import env_number
+from turn_metrics import WORKER_METRICS, MetricSet
+
+
+# ---------------------------
+# End-of-turn detection and speculative replies
+# ---------------------------
+# VAD silence says the user *paused*; the turn detector model reads the
+# transcript so far and says whether they are *done*. A likely end of turn
+# waits only min_endpointing_delay, an unlikely one up to
+# max_endpointing_delay. With preemptive generation the LLM request starts as
+# soon as a final transcript arrives, before the turn is committed; if the
+# user keeps talking livekit cancels it and the speculative reply is wasted.
+#
+# Tunables (environment):
+#   MINDFLEX_TURN_DETECTOR           multilingual (default) | english | vad
+#   MINDFLEX_MIN_ENDPOINTING_DELAY   seconds after a likely end of turn (0.5)
+#   MINDFLEX_MAX_ENDPOINTING_DELAY   seconds after an unlikely one (3.0)
+#   MINDFLEX_EOU_UNLIKELY_THRESHOLD  model probability below which a turn is
+#                                    "unlikely" to be over (model default)
+#   MINDFLEX_PREEMPTIVE_GENERATION   1 (default) | 0
+# benchmarks/bench_endpointing.py replays turn fixtures against these.
+def endpointing_config() -> dict:
+    return {
+        "turn_detector": os.getenv("MINDFLEX_TURN_DETECTOR", "multilingual").lower(),
+        "min_endpointing_delay": env_number("MINDFLEX_MIN_ENDPOINTING_DELAY", 0.5),
+        "max_endpointing_delay": env_number("MINDFLEX_MAX_ENDPOINTING_DELAY", 3.0),
+        "unlikely_threshold": env_number("MINDFLEX_EOU_UNLIKELY_THRESHOLD", None),
+        "preemptive_generation": os.getenv("MINDFLEX_PREEMPTIVE_GENERATION", "1").lower()
+        in ("1", "true", "yes"),
+    }
+
+
+# turn detector -> (module, model class); shipped with livekit-agents[turn-detector]
+TURN_DETECTORS = {
+    "multilingual": ("livekit.plugins.turn_detector.multilingual", "MultilingualModel"),
+    "english": ("livekit.plugins.turn_detector.english", "EnglishModel"),
+}
+
+
+def turn_detector_module(config: dict | None = None) -> str | None:
+    # The plugin registers its inference runner on import, so the worker's
+    # main process must import it before run_app (see providers.preload).
+    config = config or endpointing_config()
+    entry = TURN_DETECTORS.get(config["turn_detector"])
+    return entry[0] if entry else None
+
+
+def build_turn_detector(config: dict):
+    entry = TURN_DETECTORS.get(config["turn_detector"])
+    if entry is None:
+        return "vad"
+    try:
+        model = getattr(importlib.import_module(entry[0]), entry[1])
+    except ImportError:
+        logging.warning("turn-detector plugin not installed; using VAD endpointing")
+        return "vad"
+    kwargs = {}
+    if config["unlikely_threshold"] is not None:
+        kwargs["unlikely_threshold"] = config["unlikely_threshold"]
+    return model(**kwargs)
+
+
+def session_options(config: dict | None = None) -> dict:
+    # AgentSession keyword arguments for endpointing
+    config = config or endpointing_config()
+    return {
+        "turn_detection": build_turn_detector(config),
+        "min_endpointing_delay": config["min_endpointing_delay"],
+        "max_endpointing_delay": config["max_endpointing_delay"],
+        "preemptive_generation": config["preemptive_generation"],
+    }
+
+
+# ---------------------------
+# Per-session speculation counters
+# ---------------------------
+class SpeculationTracker:
+    # A reply created before the end-of-turn decision (EOU metrics carry the
+    # id of the speech that answered the turn) was speculative. Speculative
+    # replies that end without ever being scheduled were wasted; used ones
+    # saved the head start they had, capped by their LLM time to first token.
+    def __init__(self, worker_metrics: MetricSet = WORKER_METRICS) -> None:
+        self._worker_metrics = worker_metrics
+        self._created: dict[str, tuple] = {}  # speech id -> (created_at, handle)
+        self._lead: dict[str, float] = {}  # used speculative speech id -> head start
+        self._ttft: dict[str, float] = {}
+        self.stats = {"replies": 0, "speculative_used": 0, "speculative_wasted": 0}
+
+    def attach(self, session) -> None:
+        session.on("speech_created", self.on_speech_created)
+        session.on("metrics_collected", self.on_metrics_collected)
+
+    def on_speech_created(self, event) -> None:
+        handle = getattr(event, "speech_handle", None)
+        if handle is None or event.source != "generate_reply":
+            return
+        self.stats["replies"] += 1
+        self._created[handle.id] = (getattr(event, "created_at", time.time()), handle)
+        handle.add_done_callback(self._on_done)
+
+    def _on_done(self, handle) -> None:
+        self._created.pop(handle.id, None)
+        if not handle.scheduled and handle.id not in self._lead:
+            # cancelled before livekit ever queued it for playout
+            self.stats["speculative_wasted"] += 1
+            self._worker_metrics.incr("speculative_wasted")
+
+    def on_metrics_collected(self, event) -> None:
+        m = event.metrics
+        speech_id = getattr(m, "speech_id", None)
+        if speech_id is None:
+            return
+        if m.type == "llm_metrics" and m.ttft >= 0:
+            self._ttft.setdefault(speech_id, m.ttft)
+        elif m.type == "eou_metrics" and speech_id in self._created:
+            # the turn was decided before on_user_turn_completed ran; a reply
+            # created after that point is the ordinary, non-speculative one
+            decided_at = m.timestamp - m.on_user_turn_completed_delay
+            created_at, _ = self._created[speech_id]
+            lead = decided_at - created_at
+            if lead > 0:
+                self.stats["speculative_used"] += 1
+                self._lead[speech_id] = lead
+                self._worker_metrics.incr("speculative_used")
+                self._worker_metrics.observe("speculative_lead", lead)
+
+    def summary(self) -> dict:
+        saved = [
+            min(lead, self._ttft.get(speech_id, lead))
+            for speech_id, lead in self._lead.items()
+        ]
+        speculative = self.stats["speculative_used"] + self.stats["speculative_wasted"]
+        return {
+            **self.stats,
+            "waste_rate": self.stats["speculative_wasted"] / speculative if speculative else None,
+            "latency_saved_s": round(sum(saved), 3),
+            "latency_saved_mean_ms": round(sum(saved) / len(saved) * 1000, 1) if saved else None,
+        }
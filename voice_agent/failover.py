@@ -0,0 +1,230 @@
+import asyncio
+import dataclasses
+import logging
+import time
+
+from turn_metrics import WORKER_METRICS, MetricSet
+
+
+# ---------------------------
+# Provider health, hedged LLM requests and failover
+# ---------------------------
+# Each kind has a primary and an optional secondary model (providers.py).
+# STT and TTS fail over through livekit's FallbackAdapter: an error or a
+# stalled stream (MINDFLEX_<KIND>_TIMEOUT) moves the session to the secondary
+# and livekit probes the primary in the background until it recovers.
+#
+# The LLM is hedged instead, in Assistant.llm_node: the leading model gets
+# MINDFLEX_LLM_TTFT_SLO seconds to produce its first token, then the other
+# model is asked as well and whichever answers first is streamed. A model
+# that misses the SLO on several turns in a row loses the lead for a while,
+# so a degraded primary costs one SLO wait, not one per turn.
+#
+# Counters land in WORKER_METRICS under a slot name (llm_primary,
+# tts_secondary, ...) so metric names don't change with the configured model.
+class ProviderMonitor:
+    def __init__(self, worker_metrics: MetricSet = WORKER_METRICS) -> None:
+        self._worker_metrics = worker_metrics
+        self.stats: dict[str, dict] = {}
+
+    def attach(self, slot: str, provider) -> None:
+        # livekit providers emit metrics_collected/error on the instance;
+        # stand-ins without an emitter are skipped
+        if provider is None or not hasattr(provider, "on"):
+            return
+        self.stats[slot] = {
+            "label": getattr(provider, "label", type(provider).__name__),
+            "model": getattr(provider, "model", None),
+            "requests": 0,
+            "errors": 0,
+            "latency_sum": 0.0,
+        }
+        provider.on("metrics_collected", lambda m: self.on_metrics(slot, m))
+        provider.on("error", lambda e: self.on_error(slot, e))
+
+    def attach_adapter(self, kind: str, adapter) -> None:
+        # FallbackAdapter availability changes are the failovers
+        adapter.on(
+            f"{kind}_availability_changed",
+            lambda e: self.incr(f"{kind}_{'recoveries' if e.available else 'failovers'}"),
+        )
+
+    def incr(self, name: str) -> None:
+        self._worker_metrics.incr(f"provider_{name}")
+
+    def on_metrics(self, slot: str, m) -> None:
+        # first token / first audio; STT streams report no per-request latency
+        latency = getattr(m, "ttft", None)
+        if latency is None:
+            latency = getattr(m, "ttfb", None)
+        stats = self.stats[slot]
+        stats["requests"] += 1
+        self.incr(f"{slot}_requests")
+        if latency is not None and latency >= 0:
+            stats["latency_sum"] += latency
+            self._worker_metrics.observe(f"provider_{slot}_first_byte", latency)
+
+    def on_error(self, slot: str, e) -> None:
+        self.stats[slot]["errors"] += 1
+        self.incr(f"{slot}_errors")
+        if not getattr(e, "recoverable", True):
+            self.incr(f"{slot}_unrecoverable")
+        logging.warning(f"Provider {slot} error: {getattr(e, 'error', e)}")
+
+    def summary(self) -> dict:
+        return {
+            slot: {
+                "label": s["label"],
+                "model": s["model"],
+                "requests": s["requests"],
+                "errors": s["errors"],
+                "first_byte_mean_ms": (
+                    round(s["latency_sum"] / s["requests"] * 1000, 1) if s["requests"] else None
+                ),
+            }
+            for slot, s in self.stats.items()
+        }
+
+
+def with_fallback(kind: str, primary, secondary, monitor: ProviderMonitor | None = None):
+    # STT/TTS: the primary alone, or a FallbackAdapter over both
+    if monitor is not None:
+        monitor.attach(f"{kind}_primary", primary)
+        monitor.attach(f"{kind}_secondary", secondary)
+    if secondary is None or primary is None:
+        return primary
+    if kind == "tts":
+        from livekit.agents import tts
+
+        adapter = tts.FallbackAdapter([primary, secondary], max_retry_per_tts=0)
+    else:
+        from livekit.agents import stt
+
+        adapter = stt.FallbackAdapter([primary, secondary], max_retry_per_stt=0)
+    if monitor is not None:
+        monitor.attach_adapter(kind, adapter)
+    return adapter
+
+
+def prewarm_connections(*instances) -> None:
+    # Opens the providers' pooled connections (Cartesia's TTS WebSocket)
+    # while the room is still joining; the session reuses them for every
+    # reply. Needs the job's HTTP context, so call it from the entrypoint.
+    for instance in instances:
+        try:
+            if instance is not None and hasattr(instance, "prewarm"):
+                instance.prewarm()
+        except Exception as e:
+            logging.warning(f"Provider prewarm failed: {e}")
+
+
+class LLMHedge:
+    def __init__(
+        self,
+        primary,
+        secondary=None,
+        *,
+        ttft_slo: float = 1.5,
+        breaches_to_failover: int = 3,
+        cooldown: float = 60.0,
+        monitor: ProviderMonitor | None = None,
+        worker_metrics: MetricSet = WORKER_METRICS,
+    ) -> None:
+        self._models = {"primary": primary, "secondary": secondary}
+        self.ttft_slo = ttft_slo
+        self.breaches_to_failover = breaches_to_failover
+        self.cooldown = cooldown
+        self._worker_metrics = worker_metrics
+        self._breaches = 0
+        self._lead = "primary"
+        self._lead_until = 0.0
+        self.stats = {"requests": 0, "hedged": 0, "secondary_won": 0, "failovers": 0, "errors": 0}
+        if monitor is not None:
+            monitor.attach("llm_primary", primary)
+            monitor.attach("llm_secondary", secondary)
+
+    def _order(self) -> tuple:
+        if self._lead == "secondary" and time.monotonic() >= self._lead_until:
+            self._lead = "primary"  # give the primary another chance
+        backup = "secondary" if self._lead == "primary" else "primary"
+        if self._models["secondary"] is None:
+            return "primary", None
+        return self._lead, backup
+
+    def _record(self, lead: str, breached: bool) -> None:
+        if not breached:
+            self._breaches = 0
+            return
+        self._breaches += 1
+        if self._breaches >= self.breaches_to_failover and self._models["secondary"] is not None:
+            self._breaches = 0
+            self._lead = "secondary" if lead == "primary" else "primary"
+            self._lead_until = time.monotonic() + self.cooldown
+            self.stats["failovers"] += 1
+            self._worker_metrics.incr("provider_llm_failovers")
+            logging.warning(f"LLM {lead} missed the {self.ttft_slo}s SLO repeatedly; {self._lead} leads")
+
+    async def chat(self, chat_ctx, tools, tool_choice, conn_options):
+        # async generator of ChatChunks, for llm_node
+        lead, backup = self._order()
+        self.stats["requests"] += 1
+        if backup is not None:
+            # the backup answers retries; waiting out the lead's own would
+            # only delay the hedge
+            conn_options = dataclasses.replace(conn_options, max_retry=0)
+
+        def start(name: str):
+            stream = self._models[name].chat(
+                chat_ctx=chat_ctx, tools=tools, tool_choice=tool_choice, conn_options=conn_options
+            )
+            return asyncio.ensure_future(stream.__anext__()), (name, stream)
+
+        first, entry = start(lead)
+        pending = {first: entry}
+        winner = None
+        last_error = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.ttft_slo)
+            # an error before the SLO is a miss as well
+            on_time = first in done and _answered(first)
+            self._record(lead, breached=not on_time)
+            if not on_time and backup is not None:
+                self.stats["hedged"] += 1
+                self._worker_metrics.incr("provider_llm_hedged")
+                hedge, hedge_entry = start(backup)
+                pending[hedge] = hedge_entry
+
+            while winner is None and pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name, stream = pending.pop(task)
+                    if _answered(task):
+                        winner = (name, stream, task)
+                        break
+                    last_error = task.exception()
+                    await stream.aclose()
+
+            if winner is None:
+                self.stats["errors"] += 1
+                raise last_error
+            name, stream, task = winner
+            if name == "secondary":
+                self.stats["secondary_won"] += 1
+                self._worker_metrics.incr("provider_llm_secondary_won")
+            if task.exception() is not None:
+                return  # empty completion
+            yield task.result()
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # losers are cancelled as soon as there is a winner
+            for task, (_, stream) in pending.items():
+                task.cancel()
+                await stream.aclose()
+            if winner is not None:
+                await winner[1].aclose()
+
+
+def _answered(task: asyncio.Future) -> bool:
+    # first chunk arrived, or the model completed without any
+    return task.exception() is None or isinstance(task.exception(), StopAsyncIteration)
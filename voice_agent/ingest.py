@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+from typing import NamedTuple
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
+
+# ---------------------------
+# Data-packet ingest
+# ---------------------------
+# Runs synchronously inside the room's data_received callback: sniff the
+# payload type from its first byte, decode once, keep only the fields the
+# agent uses, and coalesce a burst of typed chat messages into a single user
+# turn. Nothing is allocated for the full payload beyond the parse itself.
+MAX_PAYLOAD_BYTES = 4096
+
+
+class ChatPacket(NamedTuple):
+    kind: str  # "chat" | "text" | "other"
+    text: str
+
+
+def _loads(payload: bytes):
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+# first bytes of a JSON document; anything else goes straight to the text path
+_JSON_START = frozenset(b'{["-0123456789tfn')
+_NOT_JSON = object()
+
+
+def decode_packet(payload: bytes) -> ChatPacket | None:
+    # Returns None for empty or undecodable payloads.
+    body = payload.lstrip()
+    if not body:
+        return None
+
+    if body[0] in _JSON_START:
+        try:
+            parsed = _loads(body)
+        except ValueError:
+            parsed = _NOT_JSON
+        if parsed is not _NOT_JSON and not isinstance(parsed, dict):
+            # valid JSON but not a message object ([1,2], 42, null): drop it
+            # rather than read it to the LLM as typed text
+            return None
+        if isinstance(parsed, dict):
+            kind = "chat" if parsed.get("type") == "chat" else "other"
+            text = parsed.get("text") if kind == "chat" else None
+            return ChatPacket(kind, text.strip() if isinstance(text, str) else "")
+
+    try:
+        text = body.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        return None
+    return ChatPacket("text", text) if text else None
+
+
+class DataIngest:
+    def __init__(
+        self,
+        on_turn,
+        window: float = 0.6,
+        max_delay: float = 2.0,
+        max_payload: int = MAX_PAYLOAD_BYTES,
+    ) -> None:
+        # `on_turn(text)` is called once per coalesced burst.
+        self._on_turn = on_turn
+        self._window = window
+        self._max_delay = max_delay
+        self._max_payload = max_payload
+        self._buffer: list[str] = []
+        self._first_at = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self.stats = {
+            "received": 0,
+            "oversized": 0,
+            "malformed": 0,
+            "ignored": 0,
+            "coalesced": 0,
+            "turns": 0,
+        }
+
+    def feed(self, payload: bytes) -> None:
+        self.stats["received"] += 1
+        if len(payload) > self._max_payload:
+            self.stats["oversized"] += 1
+            return
+
+        packet = decode_packet(payload)
+        if packet is None:
+            self.stats["malformed"] += 1
+            return
+        if packet.kind == "other" or not packet.text:
+            self.stats["ignored"] += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._buffer:
+            self.stats["coalesced"] += 1
+        else:
+            self._first_at = now
+        self._buffer.append(packet.text)
+
+        # Debounce: flush once the user pauses for `window`, but never hold
+        # the first message longer than `max_delay`.
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = min(self._window, self._first_at + self._max_delay - now)
+        self._timer = loop.call_later(max(0.0, delay), self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        text = "\n".join(self._buffer)
+        self._buffer.clear()
+        self.stats["turns"] += 1
+        try:
+            self._on_turn(text)
+        except Exception as e:
+            logging.error(f"Error handling typed chat turn: {e}")
+
+    def close(self) -> None:
+        # Pending typed text is dropped with the session.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._buffer.clear()
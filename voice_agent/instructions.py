@@ -0,0 +1,111 @@
+import json
+import re
+from typing import NamedTuple
+
+from prompts import (
+    MENTAL_SESSION_INSTRUCTION,
+    PHYSICAL_SESSION_INSTRUCTION,
+    GLOBAL_BEHAVIOR_INSTRUCTION,
+)
+
+
+# ---------------------------
+# Precompiled instruction variants
+# ---------------------------
+# Every (mode, tone, transition) combination is assembled once at import.
+# Each variant is laid out static-prefix-first: the large, unchanging
+# behavior + mode blocks lead, and the short volatile parts (transition text,
+# tone hint) trail, so consecutive requests share the longest possible prefix
+# for provider-side prompt caching.
+MODES = ("mental", "physical")
+TONES = ("low", "neutral", "high")
+# switch: mode change, chat: typed message reply (the opener and the
+# repeated-mode acknowledgement are scripted lines, see tts_cache.py)
+TRANSITIONS = ("switch", "chat")
+
+# Lines spoken as scripted audio are left out here rather than repeated by
+# the LLM: the mental opener (played at session start) and the physical
+# safety note (played before the switch reply). The physical opener stays in;
+# the switch reply is where it gets said.
+_OPENER_RE = re.compile(r'Begin the conversation by saying:\s*"[^"]+"\s*')
+_SAFETY_NOTE_RE = re.compile(r"\*\*Safety Note:\*\*.+?\n\s*\n", re.S)
+
+STATIC_PREFIXES = {
+    "global": GLOBAL_BEHAVIOR_INSTRUCTION,
+    "global+mental": GLOBAL_BEHAVIOR_INSTRUCTION + _OPENER_RE.sub("", MENTAL_SESSION_INSTRUCTION),
+    "global+physical": GLOBAL_BEHAVIOR_INSTRUCTION
+    + _SAFETY_NOTE_RE.sub("", PHYSICAL_SESSION_INSTRUCTION),
+}
+
+
+class InstructionVariant(NamedTuple):
+    text: str
+    prefix_key: str
+    token_estimate: int
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose; close enough for budgeting.
+    return (len(text) + 3) // 4
+
+
+def _transition_text(mode: str, transition: str) -> str:
+    if transition != "switch":
+        return ""
+    text = f"\nYou’re now in {mode} wellness mode — let’s continue naturally from where we left off.\n"
+    if mode == "physical":
+        text += "The safety note has just been read aloud; don’t repeat it.\n"
+    return text
+
+
+def _tone_text(tone: str, transition: str) -> str:
+    if transition == "chat":
+        return f"\nMaintain a '{tone}' energy and flow naturally.\n"
+    return f"\n(When replying, adopt a '{tone}' energy level in tone and pacing.)\n"
+
+
+def _build_variant(mode: str, tone: str, transition: str) -> InstructionVariant:
+    # Typed-chat replies only need the behavior block.
+    if transition == "chat":
+        prefix_key = "global"
+    else:
+        prefix_key = f"global+{mode}"
+    text = (
+        STATIC_PREFIXES[prefix_key]
+        + _transition_text(mode, transition)
+        + _tone_text(tone, transition)
+    )
+    return InstructionVariant(text, prefix_key, estimate_tokens(text))
+
+
+VARIANTS = {
+    (mode, tone, transition): _build_variant(mode, tone, transition)
+    for mode in MODES
+    for tone in TONES
+    for transition in TRANSITIONS
+}
+
+
+def get_instructions(
+    mode: str, tone: str = "neutral", transition: str = "switch"
+) -> str:
+    variant = VARIANTS.get((mode, tone, transition))
+    if variant is None:
+        # unknown tone labels fall back to neutral rather than failing a reply
+        variant = VARIANTS[(mode, "neutral", transition)]
+    return variant.text
+
+
+def token_report() -> dict:
+    return {
+        "/".join(key): {
+            "tokens": variant.token_estimate,
+            "static_prefix": variant.prefix_key,
+            "prefix_tokens": estimate_tokens(STATIC_PREFIXES[variant.prefix_key]),
+        }
+        for key, variant in VARIANTS.items()
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(token_report(), indent=2))
@@ -0,0 +1,195 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import uuid
+from datetime import datetime
+
+
+# ---------------------------
+# Append-only conversation journal
+# ---------------------------
+# Each conversation record is appended as one compact JSON line by a
+# background writer task. Nothing but the write queue is kept in memory; the
+# transcript lives on disk and is rolled into the final conversation file
+# ({"conversation": [...], **extra}) when the session closes.
+#
+# The journal is named after the room and start time and stays flock()ed
+# while its process lives, so after a crash recover_orphaned() can still
+# roll it into <room>_<timestamp>.json.
+_JOURNAL_RE = re.compile(r"^\.journal_(?P<room>.+)_(?P<ts>\d{8}_\d{6})_[0-9a-f]{8}\.jsonl$")
+
+
+class ConversationJournal:
+    def __init__(
+        self,
+        directory: str = "./conversations",
+        room_name: str = "session",
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.directory = directory
+        started = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(
+            directory, f".journal_{_safe_name(room_name)}_{started}_{uuid.uuid4().hex[:8]}.jsonl"
+        )
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: asyncio.Task | None = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
+
+    def append(self, record: dict) -> None:
+        # Called from sync event handlers: never blocks, never touches disk.
+        if self._closed:
+            return
+        self._queue.put_nowait(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    async def _writer(self) -> None:
+        f = await asyncio.to_thread(_open_locked, self.path)
+        try:
+            while True:
+                line = await self._queue.get()
+                if line is None:
+                    break
+                batch = [line]
+                done = False
+                # Gather whatever else arrives within the flush window so a
+                # burst of items costs a single write + fsync.
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self._flush_interval
+                while len(batch) < self._batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        line = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if line is None:
+                        done = True
+                        break
+                    batch.append(line)
+
+                await asyncio.to_thread(_write_batch, f, batch)
+                if done:
+                    break
+        except Exception as e:
+            logging.error(f"Conversation journal writer failed: {e}")
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def close(
+        self, room_name: str, timestamp: str, extra: dict | None = None
+    ) -> str:
+        # Drain the writer, then roll the journal into the final file.
+        self._closed = True
+        if self._writer_task is not None:
+            self._queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+
+        conv_file = os.path.join(self.directory, f"{_safe_name(room_name)}_{timestamp}.json")
+        await asyncio.to_thread(_roll_journal, self.path, conv_file, extra or {})
+        return conv_file
+
+
+def _safe_name(room_name: str) -> str:
+    # room names end up in file names; keep them inside the directory
+    return re.sub(r"[^\w.-]", "-", room_name).lstrip(".") or "session"
+
+
+def _open_locked(path: str):
+    # held until the file is closed or the process dies
+    f = open(path, "a", encoding="utf-8")
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    return f
+
+
+def recover_orphaned(directory: str = "./conversations") -> list:
+    # Roll journals left behind by crashed job processes. A journal whose
+    # lock can be taken has no live writer. Run once at worker startup.
+    recovered = []
+    for path in sorted(glob.glob(os.path.join(directory, ".journal_*.jsonl"))):
+        m = _JOURNAL_RE.match(os.path.basename(path))
+        if m is None:
+            continue
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                conv_file = os.path.join(directory, f"{m['room']}_{m['ts']}.json")
+                _roll_journal(
+                    path, conv_file, {"room": m["room"], "recovered": True}, check_lines=True
+                )
+        except BlockingIOError:
+            continue  # a live session still owns it
+        except Exception as e:
+            logging.error(f"Failed to recover journal {path}: {e}")
+            continue
+        recovered.append(conv_file)
+        logging.info(f"Recovered orphaned journal into {conv_file}")
+    return recovered
+
+
+def _valid_json(line: str) -> bool:
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+def _write_batch(f, batch: list) -> None:
+    f.write("\n".join(batch) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _roll_journal(
+    journal_path: str, conv_file: str, extra: dict, check_lines: bool = False
+) -> None:
+    # Stream the JSONL lines into the saved file's "conversation" array
+    # without loading the transcript into memory. Written under a temporary
+    # name and renamed, so readers (the store, the recommendations scanner)
+    # never see a partial file.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(conv_file) or ".", prefix=".roll_", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            out.write('{\n "conversation": [')
+            first = True
+            if os.path.exists(journal_path):
+                with open(journal_path, "r", encoding="utf-8") as journal:
+                    for line in journal:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        if check_lines and not _valid_json(line):
+                            continue  # torn write from a crash
+                        out.write("\n  " if first else ",\n  ")
+                        out.write(line)
+                        first = False
+            out.write("\n ]" if not first else "]")
+            for key, value in extra.items():
+                out.write(f",\n {json.dumps(key)}: ")
+                json.dump(value, out, ensure_ascii=False)
+            out.write("\n}\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, conv_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
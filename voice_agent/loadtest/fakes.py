@@ -0,0 +1,258 @@
+import asyncio
+import itertools
+import random
+import time
+from types import SimpleNamespace
+
+
+# ---------------------------
+# Stand-ins for LiveKit and the STT/LLM/TTS providers
+# ---------------------------
+# Just enough surface for agent.entrypoint: event emitters with livekit's
+# `on(event, callback=None)` decorator form, a session that plays out replies
+# with synthetic provider latencies and emits the same events AgentSession
+# does, and a room that delivers data packets and disconnects.
+class LatencyProfile:
+    def __init__(
+        self,
+        stt_delay: float = 0.25,
+        llm_ttft: float = 0.45,
+        llm_tokens_per_s: float = 80.0,
+        tts_ttfb: float = 0.15,
+        speech_rate_cps: float = 15.0,
+        jitter: float = 0.2,
+        time_scale: float = 1.0,
+        seed: int | None = None,
+    ) -> None:
+        self.stt_delay = stt_delay
+        self.llm_ttft = llm_ttft
+        self.llm_tokens_per_s = llm_tokens_per_s
+        self.tts_ttfb = tts_ttfb
+        self.speech_rate_cps = speech_rate_cps
+        self.jitter = jitter
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+
+    def delay(self, base: float) -> float:
+        return max(0.0, base * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+
+    async def sleep(self, base: float) -> None:
+        await asyncio.sleep(self.delay(base) * self.time_scale)
+
+
+class HandlerStats:
+    def __init__(self) -> None:
+        self.events = 0
+        self.handler_time = 0.0
+        self.schedule_latencies = []
+
+    def timed_call(self, callback, *args) -> None:
+        t0 = time.perf_counter()
+        try:
+            callback(*args)
+        finally:
+            self.handler_time += time.perf_counter() - t0
+            self.events += 1
+
+
+class FakeEmitter:
+    def __init__(self, stats: HandlerStats) -> None:
+        self._handlers: dict[str, list] = {}
+        self._stats = stats
+
+    def on(self, event: str, callback=None):
+        if callback is None:
+            def decorator(fn):
+                self._handlers.setdefault(event, []).append(fn)
+                return fn
+
+            return decorator
+        self._handlers.setdefault(event, []).append(callback)
+        return callback
+
+    def off(self, event: str, callback) -> None:
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def emit(self, event: str, *args) -> None:
+        for callback in list(self._handlers.get(event, [])):
+            self._stats.timed_call(callback, *args)
+
+
+_ids = itertools.count()
+
+
+def _item(role: str, text: str, interrupted: bool = False):
+    return SimpleNamespace(
+        id=f"item_{next(_ids)}",
+        role=role,
+        text_content=text,
+        content=[text],
+        interrupted=interrupted,
+        created_at=time.time(),
+    )
+
+
+def _event(**fields):
+    fields.setdefault("created_at", time.time())
+    return SimpleNamespace(**fields)
+
+
+class FakeSpeechHandle:
+    def __init__(self, task: asyncio.Task) -> None:
+        self._task = task
+
+    def interrupt(self, force: bool = False):
+        self._task.cancel()
+        return self
+
+    def __await__(self):
+        return self._task.__await__()
+
+
+class FakeSession(FakeEmitter):
+    def __init__(self, profile: LatencyProfile, stats: HandlerStats) -> None:
+        super().__init__(stats)
+        self.profile = profile
+        self.agent = None
+        self.replies = 0
+        # perf_counter of the latest event that may trigger a handler reply
+        self.last_trigger: float | None = None
+        self._agent_state = "listening"
+
+    async def start(self, room, agent, room_input_options=None, **kwargs) -> None:
+        self.agent = agent
+        room.session = self
+        room.started.set()
+
+    def _set_agent_state(self, state: str) -> None:
+        old, self._agent_state = self._agent_state, state
+        self.emit("agent_state_changed", _event(old_state=old, new_state=state))
+
+    def generate_reply(self, *, instructions=None, user_input=None, auto=False):
+        if not auto and self.last_trigger is not None:
+            self._stats.schedule_latencies.append(
+                time.perf_counter() - self.last_trigger
+            )
+            self.last_trigger = None
+        self.replies += 1
+        return FakeSpeechHandle(asyncio.create_task(self._speak(user_input)))
+
+    def say(self, text, audio=None, **kwargs):
+        return FakeSpeechHandle(asyncio.create_task(self._speak(text, scripted=True)))
+
+    async def _speak(self, user_input, scripted: bool = False) -> None:
+        p = self.profile
+        self.emit("speech_created", _event(user_initiated=True, source="generate_reply"))
+        text = "It sounds like there's a lot on your mind. Let's take it slowly. " * 2
+        if not scripted:
+            self._set_agent_state("thinking")
+            ttft = p.delay(p.llm_ttft)
+            await asyncio.sleep(ttft * p.time_scale)
+            self.emit(
+                "metrics_collected",
+                _event(metrics=SimpleNamespace(type="llm_metrics", ttft=ttft)),
+            )
+        ttfb = p.delay(p.tts_ttfb)
+        await asyncio.sleep(ttfb * p.time_scale)
+        self.emit(
+            "metrics_collected",
+            _event(metrics=SimpleNamespace(type="tts_metrics", ttfb=ttfb)),
+        )
+        self._set_agent_state("speaking")
+        await p.sleep(len(text) / p.speech_rate_cps)
+        self._set_agent_state("listening")
+        self.emit("conversation_item_added", _event(item=_item("assistant", text)))
+
+    async def user_turn(self, text: str) -> None:
+        # VAD start/stop, interim + final transcripts, committed user item,
+        # then the automatic reply AgentSession would generate.
+        p = self.profile
+        self.emit("user_state_changed", _event(old_state="listening", new_state="speaking"))
+        await p.sleep(len(text) / p.speech_rate_cps)
+        self.emit("user_state_changed", _event(old_state="speaking", new_state="listening"))
+        words = text.split()
+        self.emit(
+            "user_input_transcribed",
+            _event(transcript=" ".join(words[: max(1, len(words) // 2)]), is_final=False, speaker_id=None, language="en"),
+        )
+        await p.sleep(p.stt_delay)
+        self.last_trigger = time.perf_counter()
+        self.emit(
+            "user_input_transcribed",
+            _event(transcript=text, is_final=True, speaker_id=None, language="en"),
+        )
+        self.emit("conversation_item_added", _event(item=_item("user", text)))
+        await self.generate_reply(user_input=text, auto=True)
+
+
+class FakeRoom(FakeEmitter):
+    def __init__(self, name: str, stats: HandlerStats, identity: str) -> None:
+        super().__init__(stats)
+        self.name = name
+        self.remote_participants = {identity: SimpleNamespace(identity=identity)}
+        self.session: FakeSession | None = None
+        self.started = asyncio.Event()
+
+    def send_data(self, payload: bytes) -> None:
+        if self.session is not None:
+            self.session.last_trigger = time.perf_counter()
+        self.emit("data_received", SimpleNamespace(data=payload, participant=None, topic=None))
+
+
+class FakeLLM:
+    # Streams a canned completion; used by the background summarizer.
+    def __init__(self, profile: LatencyProfile) -> None:
+        self.profile = profile
+
+    def chat(self, *, chat_ctx=None, **kwargs):
+        return _FakeLLMStream(self.profile)
+
+
+class _FakeLLMStream:
+    def __init__(self, profile: LatencyProfile) -> None:
+        self.profile = profile
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        await self.profile.sleep(self.profile.llm_ttft)
+        for word in "The user has been discussing stress and sleep.".split():
+            await asyncio.sleep(self.profile.time_scale / self.profile.llm_tokens_per_s)
+            yield SimpleNamespace(delta=SimpleNamespace(content=word + " "))
+
+
+class FakeJobContext:
+    def __init__(self, index: int, profile: LatencyProfile, stats: HandlerStats) -> None:
+        room_name = f"loadtest_{index}"
+        self.job = SimpleNamespace(id=f"job_{index}", room=SimpleNamespace(name=room_name))
+        # a small pool of users so later sessions find earlier ones' history
+        self.room = FakeRoom(room_name, stats, identity=f"user_{index % 5}")
+        self.proc = SimpleNamespace(
+            userdata={
+                "vad": SimpleNamespace(label="fake-vad"),
+                "stt": SimpleNamespace(label="fake-stt"),
+                "tts": SimpleNamespace(label="fake-tts", sample_rate=24000),
+                "llm": FakeLLM(profile),
+            }
+        )
+
+        self.shutdown_reason: str | None = None
+
+    async def connect(self) -> None:
+        await asyncio.sleep(0)
+
+    async def wait_for_participant(self):
+        return next(iter(self.room.remote_participants.values()))
+
+    def shutdown(self, reason: str = "") -> None:
+        self.shutdown_reason = reason
+
+
+class FakeAssistant:
+    def __init__(self, **kwargs) -> None:
+        self.options = kwargs
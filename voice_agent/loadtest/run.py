@@ -0,0 +1,217 @@
+"""Offline multi-session load test for agent.entrypoint.
+
+Runs N concurrent sessions against stand-in LiveKit rooms/sessions and fake
+providers (see fakes.py), replaying user turns and typed chat packets, and
+reports handler throughput, event-loop lag, memory per session and reply
+scheduling latency.
+
+    python loadtest/run.py --sessions 50 --turns 20 --time-scale 0.1
+    python loadtest/run.py --corpus ../conversations --sessions 20
+
+The agent writes its conversations/logs/metrics into a temporary working
+directory, never the real ones.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import psutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from fakes import (  # noqa: E402
+    FakeAssistant,
+    FakeJobContext,
+    FakeSession,
+    HandlerStats,
+    LatencyProfile,
+)
+
+USER_LINES = [
+    "I've been feeling a bit stressed about work lately.",
+    "My sleep has been all over the place this week.",
+    "Can we switch to a physical session for a bit?",
+    "My neck is stiff from sitting at the laptop all day.",
+    "Let's go back to the mental wellness session.",
+    "I tried journaling yesterday and it actually helped.",
+    "I'm not sure, I just feel kind of flat today.",
+]
+CHAT_LINES = ["hello?", "can you hear me", "I feel tired", "thanks, that helped"]
+
+
+def generated_script(turns: int, rng: random.Random) -> list:
+    script = []
+    for _ in range(turns):
+        if rng.random() < 0.2:
+            payload = {"type": "chat", "text": rng.choice(CHAT_LINES)}
+            script.append(("data", json.dumps(payload).encode()))
+        else:
+            script.append(("speech", rng.choice(USER_LINES)))
+    return script
+
+
+def corpus_scripts(directory: str) -> list:
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data["conversation"] if isinstance(data, dict) else data
+        turns = [
+            ("speech", r["text"])
+            for r in records
+            if r.get("role") == "user" and r.get("text")
+        ]
+        if turns:
+            scripts.append(turns)
+    return scripts
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - t0 - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self._task.cancel()
+
+
+async def run_session(agent, index, script, profile, stats, think_time, peak):
+    ctx = FakeJobContext(index, profile, stats)
+    setup = asyncio.create_task(agent.entrypoint(ctx))
+    await ctx.room.started.wait()
+    await setup
+    session = ctx.room.session
+
+    for kind, value in script:
+        if kind == "data":
+            ctx.room.send_data(value)
+        else:
+            await session.user_turn(value)
+        await profile.sleep(think_time)
+
+    peak.append(psutil.Process().memory_info().rss)
+    ctx.room.emit("disconnected")
+    shutdown = [
+        t
+        for t in asyncio.all_tasks()
+        if getattr(t.get_coro(), "__name__", "") == "handle_room_disconnected"
+    ]
+    await asyncio.gather(*shutdown)
+    return session.replies
+
+
+async def run(args) -> dict:
+    import agent
+
+    profile = LatencyProfile(
+        stt_delay=args.stt_delay,
+        llm_ttft=args.llm_ttft,
+        tts_ttfb=args.tts_ttfb,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    stats = HandlerStats()
+    agent.AgentSession = lambda *a, **kw: FakeSession(profile, stats)
+    agent.Assistant = FakeAssistant
+    agent.RoomInputOptions = lambda **kw: SimpleNamespace(**kw)
+    # the turn-detector model needs a real job context; fakes endpoint on VAD
+    os.environ.setdefault("MINDFLEX_TURN_DETECTOR", "vad")
+    os.environ.setdefault("MINDFLEX_NOISE_CANCELLATION", "none")
+
+    rng = random.Random(args.seed)
+    corpus = corpus_scripts(args.corpus) if args.corpus else []
+    scripts = [
+        corpus[i % len(corpus)][: args.turns]
+        if corpus
+        else generated_script(args.turns, rng)
+        for i in range(args.sessions)
+    ]
+
+    process = psutil.Process()
+    baseline_rss = process.memory_info().rss
+    peak = []
+    monitor = LoopLagMonitor()
+    monitor.start()
+    cpu0 = process.cpu_times()
+    t0 = time.perf_counter()
+    replies = await asyncio.gather(
+        *(
+            run_session(agent, i, scripts[i], profile, stats, args.think_time, peak)
+            for i in range(args.sessions)
+        )
+    )
+    elapsed = time.perf_counter() - t0
+    cpu1 = process.cpu_times()
+    monitor.stop()
+
+    lags = sorted(monitor.lags) or [0.0]
+    sched = sorted(stats.schedule_latencies) or [0.0]
+    return {
+        "sessions": args.sessions,
+        "elapsed_s": elapsed,
+        "cpu_utilization": (cpu1.user + cpu1.system - cpu0.user - cpu0.system) / elapsed,
+        "events": stats.events,
+        "events_per_s": stats.events / elapsed,
+        "handler_us_per_event": stats.handler_time / max(1, stats.events) * 1e6,
+        "loop_lag_p50_ms": lags[len(lags) // 2] * 1000,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "loop_lag_max_ms": lags[-1] * 1000,
+        "rss_per_session_kb": (max(peak) - baseline_rss) / args.sessions / 1024,
+        "replies": sum(replies),
+        "schedule_p50_ms": statistics.median(sched) * 1000,
+        "schedule_p99_ms": sched[int(len(sched) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--corpus", help="directory of saved conversation JSON files")
+    parser.add_argument("--think-time", type=float, default=1.0)
+    parser.add_argument("--stt-delay", type=float, default=0.25)
+    parser.add_argument("--llm-ttft", type=float, default=0.45)
+    parser.add_argument("--tts-ttfb", type=float, default=0.15)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    if args.corpus:
+        args.corpus = os.path.abspath(args.corpus)
+    workdir = tempfile.mkdtemp(prefix="mindflex-loadtest-")
+    os.chdir(workdir)
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps({**result, "workdir": workdir}))
+        return
+    for key, value in result.items():
+        print(f"{key:>22}: {value:.2f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    print(f"{'workdir':>22}: {workdir}")
+
+
+if __name__ == "__main__":
+    main()
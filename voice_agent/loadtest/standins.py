@@ -0,0 +1,193 @@
+"""Local stand-ins for the Gemini and Cartesia APIs with injected latency and faults.
+
+    python loadtest/standins.py --port 8787 --slow-rate 0.2 --error-rate 0.05
+    python loadtest/standins.py --faulty-model gemini-2.5-flash --error-rate 1
+    MINDFLEX_GEMINI_BASE_URL=http://127.0.0.1:8787 \
+    MINDFLEX_CARTESIA_BASE_URL=http://127.0.0.1:8787 \
+    GOOGLE_API_KEY=x CARTESIA_API_KEY=x python agent.py dev
+
+Speaks just enough of each wire protocol for the real plugins:
+Gemini's streamGenerateContent (server-sent events) and Cartesia's TTS
+WebSocket (JSON chunks of base64 PCM). Each model has its own FaultProfile,
+so a slow or failing primary can be tested against a healthy secondary;
+models without one use the default profile.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+
+from aiohttp import WSMsgType, web
+
+REPLY = "It sounds like a lot has been on your mind lately. Let's take a slow breath together first."
+
+
+class FaultProfile:
+    def __init__(
+        self,
+        first_byte: float = 0.3,
+        jitter: float = 0.3,
+        slow_rate: float = 0.0,
+        slow_first_byte: float = 5.0,
+        error_rate: float = 0.0,
+        chunk_interval: float = 0.02,
+        seed: int | None = None,
+    ) -> None:
+        self.first_byte = first_byte
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_first_byte = slow_first_byte
+        self.error_rate = error_rate
+        self.chunk_interval = chunk_interval
+        self._rng = random.Random(seed)
+
+    def draw(self) -> tuple:
+        # (first-byte delay, fail?) for one request
+        if self._rng.random() < self.error_rate:
+            return 0.0, True
+        base = self.slow_first_byte if self._rng.random() < self.slow_rate else self.first_byte
+        return base * (1 + self._rng.uniform(-self.jitter, self.jitter)), False
+
+
+class StandIns:
+    def __init__(self, profiles: dict | None = None, default: FaultProfile | None = None) -> None:
+        self.profiles = profiles or {}
+        self.default = default or FaultProfile()
+        self.stats: dict[str, dict] = {}
+        self.app = web.Application()
+        self.app.router.add_post("/{version}/models/{call}", self.gemini_stream)
+        self.app.router.add_get("/tts/websocket", self.cartesia_tts)
+        self._runner = None
+
+    def _draw(self, model: str) -> tuple:
+        stats = self.stats.setdefault(model, {"requests": 0, "errors": 0})
+        stats["requests"] += 1
+        delay, fail = self.profiles.get(model, self.default).draw()
+        stats["errors"] += fail
+        return delay, fail
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def aclose(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # ---------------------------
+    # Gemini: POST /v1beta/models/<model>:streamGenerateContent?alt=sse
+    # ---------------------------
+    async def gemini_stream(self, request: web.Request) -> web.StreamResponse:
+        model = request.match_info["call"].split(":")[0]
+        await request.read()
+        delay, fail = self._draw(model)
+        if fail:
+            return web.json_response(
+                {"error": {"code": 503, "message": "injected fault", "status": "UNAVAILABLE"}},
+                status=503,
+            )
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(delay)
+        profile = self.profiles.get(model, self.default)
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunk = {
+                "candidates": [
+                    {
+                        "content": {"role": "model", "parts": [{"text": word + ("" if last else " ")}]},
+                        "index": 0,
+                        **({"finishReason": "STOP"} if last else {}),
+                    }
+                ],
+                "modelVersion": model,
+            }
+            if last:
+                chunk["usageMetadata"] = {
+                    "promptTokenCount": 100,
+                    "candidatesTokenCount": len(words),
+                    "totalTokenCount": 100 + len(words),
+                }
+            try:
+                await response.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            except ConnectionResetError:
+                return response  # client gave up (a hedge that lost)
+            await asyncio.sleep(profile.chunk_interval)
+        await response.write_eof()
+        return response
+
+    # ---------------------------
+    # Cartesia: GET /tts/websocket
+    # ---------------------------
+    async def cartesia_tts(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        failed = set()  # context ids that got an injected error
+        started = set()
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            pkt = json.loads(msg.data)
+            context_id = pkt.get("context_id")
+            if context_id in failed:
+                continue
+            if context_id not in started:
+                delay, fail = self._draw(pkt.get("model_id", "default"))
+                if fail:
+                    failed.add(context_id)
+                    await ws.send_json({"type": "error", "context_id": context_id, "error": "injected fault"})
+                    continue
+                await asyncio.sleep(delay)
+                started.add(context_id)
+            sample_rate = pkt.get("output_format", {}).get("sample_rate", 24000)
+            # 20ms of 16-bit silence per word
+            audio = base64.b64encode(bytes(sample_rate // 50 * 2)).decode()
+            for _ in pkt.get("transcript", "").split():
+                await ws.send_json({"type": "chunk", "data": audio, "done": False, "context_id": context_id})
+            if not pkt.get("continue", True):
+                await ws.send_json({"type": "done", "done": True, "context_id": context_id})
+        return ws
+
+
+async def _serve(args) -> None:
+    primary = FaultProfile(
+        first_byte=args.first_byte,
+        slow_rate=args.slow_rate,
+        slow_first_byte=args.slow_first_byte,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    if args.faulty_model:
+        # faults only on that model; the secondary stays healthy
+        standins = StandIns({args.faulty_model: primary}, FaultProfile(args.first_byte, seed=args.seed))
+    else:
+        standins = StandIns(default=primary)
+    url = await standins.start(port=args.port)
+    print(f"Stand-ins listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standins.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--first-byte", type=float, default=0.3)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-first-byte", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--faulty-model", help="inject faults for this model only")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+from datetime import datetime, timezone
+
+
+# ---------------------------
+# Non-blocking structured logging
+# ---------------------------
+# Handlers on the event loop only enqueue records; formatting and file I/O
+# happen on a QueueListener thread. Records are written as JSON lines tagged
+# with the room and session they belong to.
+#
+# Every process appends to the same app.log, but only the worker's main
+# process rotates it: job processes (livekit starts each in its own
+# multiprocessing child) reopen the file when it has been rotated under them
+# instead of renaming it on their own schedule.
+
+# Room/session tags for the current job. livekit fires room and session
+# events from its own context, so the entrypoint wraps its callbacks in
+# with_log_context; together these keep tags right when several sessions
+# share one process (load tests). The process default covers anything else,
+# and is only reliable with one job per process.
+_log_context: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "mindflex_log_context", default=None
+)
+_process_log_context: dict = {}
+
+# Level-gated replacement for the old stdout prints. Enabled with
+# MINDFLEX_DEBUG=1; when disabled, callers should skip building the message.
+debug_log = logging.getLogger("mindflex.debug")
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def bind_log_context(**fields) -> None:
+    ctx = dict(_log_context.get() or _process_log_context)
+    ctx.update(fields)
+    _log_context.set(ctx)
+    _process_log_context.update(fields)
+
+
+def with_log_context(fn):
+    # Runs a callback under the tags bound where it was wrapped; tasks and
+    # timers it schedules inherit them.
+    fields = _log_context.get() or dict(_process_log_context)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _log_context.set(fields)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _log_context.reset(token)
+
+    return wrapper
+
+
+class _ContextFilter(logging.Filter):
+    # Runs on the caller's side of the queue, where the contextvar is visible.
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _log_context.get() or _process_log_context
+        record.room = ctx.get("room")
+        record.session = ctx.get("session")
+        return True
+
+
+class _LightQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() runs the full formatter and copies the record on the
+    # caller's thread; only the message merge needs to happen before handoff.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "room": getattr(record, "room", None),
+            "session": getattr(record, "session", None),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def _build_file_handler(
+    path: str, max_bytes: int, backup_count: int, when: str | None, rotate: bool
+) -> logging.Handler:
+    if not rotate:
+        # append-only; reopens app.log after the main process rotates it
+        return logging.handlers.WatchedFileHandler(path, encoding="utf-8")
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+def setup_logging(
+    log_dir: str = "./logs",
+    level: int = logging.INFO,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    when: str | None = None,
+    rotate: bool | None = None,
+) -> logging.handlers.QueueListener:
+    # rotate defaults to True only outside multiprocessing children
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if rotate is None:
+        rotate = multiprocessing.parent_process() is None
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = _build_file_handler(
+        os.path.join(log_dir, "app.log"),
+        max_bytes,
+        backup_count,
+        when or os.getenv("MINDFLEX_LOG_ROTATE_WHEN"),
+        rotate,
+    )
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+
+    debug_enabled = os.getenv("MINDFLEX_DEBUG", "").lower() in ("1", "true", "yes")
+    debug_log.setLevel(logging.DEBUG if debug_enabled else logging.INFO)
+    if debug_enabled:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(message)s"))
+        console.addFilter(lambda record: record.name == debug_log.name)
+        handlers.append(console)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _LightQueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    # debug_log carries its own level; propagation to these handlers does not
+    # re-check the root level.
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    # Flushes anything still queued; safe to call more than once.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
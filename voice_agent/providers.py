@@ -0,0 +1,174 @@
+import importlib
+import logging
+import os
+
+
+# ---------------------------
+# Provider registry
+# ---------------------------
+# Plugins are imported only when a provider is built (or preloaded), so
+# importing agent.py stays cheap and unselected plugins are never loaded.
+# Selection is by environment, one variable per kind:
+#   MINDFLEX_VAD=silero  MINDFLEX_STT=cartesia  MINDFLEX_TTS=cartesia
+#   MINDFLEX_LLM=google  MINDFLEX_NOISE_CANCELLATION=bvc|none
+# The first entry of each kind is the default.
+#
+# livekit requires plugins to be imported on the main thread, and the worker
+# only preloads (forkserver) and downloads files for plugins it has seen, so
+# the worker's main process calls preload() before run_app, and prewarm calls
+# it again in each job process (a no-op once the modules are loaded).
+#
+# Secondary models and voice-tuned timeouts (environment):
+#   MINDFLEX_<KIND>_MODEL           override the primary model
+#   MINDFLEX_<KIND>_FALLBACK_MODEL  secondary model of the same provider, or
+#                                   "none" (LLM default gemini-2.5-flash-lite)
+#   MINDFLEX_LLM_TTFT_SLO           seconds to first token before the LLM
+#                                   request is hedged (1.5, see failover.py)
+#   MINDFLEX_<KIND>_TIMEOUT         per-attempt timeout (STT 10, TTS 5, LLM 10)
+#   MINDFLEX_<KIND>_MAX_RETRY       retries on the same model (STT 3, else 1)
+#   MINDFLEX_CARTESIA_BASE_URL      point plugins at another endpoint, e.g.
+#   MINDFLEX_GEMINI_BASE_URL        the stand-ins in loadtest/standins.py
+
+# shared with the TTS cache warm-up so cached audio matches the live voice
+TTS_OPTIONS = {"model": "sonic-3"}
+
+# kind -> name -> (module, attribute path, default kwargs); a callable
+# registered with register() stands in for the tuple (tests, benchmarks)
+REGISTRY = {
+    "vad": {"silero": ("livekit.plugins.silero", "VAD.load", {})},
+    "stt": {
+        "cartesia": ("livekit.plugins.cartesia", "STT", {"model": "ink-whisper", "language": "en"}),
+    },
+    "tts": {"cartesia": ("livekit.plugins.cartesia", "TTS", TTS_OPTIONS)},
+    "llm": {
+        "google": ("livekit.plugins.google", "LLM", {"model": "gemini-2.5-flash", "temperature": 0.8}),
+    },
+    "noise_cancellation": {
+        "bvc": ("livekit.plugins.noise_cancellation", "BVC", {}),
+        "none": None,
+    },
+}
+
+
+# kind -> secondary model used when none is configured
+FALLBACK_MODELS = {"llm": "gemini-2.5-flash-lite"}
+
+# kind -> (timeout, max_retry, retry_interval); livekit's defaults (10s, 3
+# retries 2s apart) leave a caller in silence for half a minute
+CONN_DEFAULTS = {"stt": (10.0, 3, 1.0), "tts": (5.0, 1, 0.3), "llm": (10.0, 1, 0.3)}
+
+# module -> (environment variable, kwargs for an alternate endpoint)
+ENDPOINTS = {
+    "livekit.plugins.cartesia": ("MINDFLEX_CARTESIA_BASE_URL", lambda url: {"base_url": url}),
+    "livekit.plugins.google": (
+        "MINDFLEX_GEMINI_BASE_URL",
+        lambda url: {"http_options": _gemini_http_options(url)},
+    ),
+}
+
+
+def _gemini_http_options(url: str):
+    # per-request options replace the plugin's own timeout, so carry it over
+    from google.genai import types
+
+    return types.HttpOptions(base_url=url, timeout=int(conn_options("llm").timeout * 1000))
+
+
+def env_number(name: str, default, cast=float):
+    # MINDFLEX_* numbers: unset or malformed values fall back to the default
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logging.warning(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+def register(kind: str, name: str, spec) -> None:
+    REGISTRY.setdefault(kind, {})[name] = spec
+
+
+def selected(kind: str) -> str:
+    choices = REGISTRY[kind]
+    name = os.getenv(f"MINDFLEX_{kind.upper()}", next(iter(choices)))
+    if name not in choices:
+        raise ValueError(f"Unknown {kind} provider {name!r}; choose from {sorted(choices)}")
+    return name
+
+
+def _resolve(spec):
+    module, attr, _ = spec
+    target = importlib.import_module(module)
+    for part in attr.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def build(kind: str, **overrides):
+    # A new provider instance for the configured choice; None if disabled.
+    spec = REGISTRY[kind][selected(kind)]
+    if spec is None:
+        return None
+    if os.getenv(f"MINDFLEX_{kind.upper()}_MODEL"):
+        overrides.setdefault("model", os.environ[f"MINDFLEX_{kind.upper()}_MODEL"])
+    if callable(spec):
+        return spec(**overrides)
+    kwargs = dict(spec[2])
+    endpoint = ENDPOINTS.get(spec[0])
+    if endpoint and os.getenv(endpoint[0]):
+        kwargs.update(endpoint[1](os.environ[endpoint[0]]))
+    return _resolve(spec)(**{**kwargs, **overrides})
+
+
+def fallback_model(kind: str) -> str | None:
+    model = os.getenv(f"MINDFLEX_{kind.upper()}_FALLBACK_MODEL", FALLBACK_MODELS.get(kind))
+    return None if not model or model.lower() == "none" else model
+
+
+def build_fallback(kind: str, **overrides):
+    # The same provider with the secondary model; None if none is configured.
+    model = fallback_model(kind)
+    if model is None:
+        return None
+    return build(kind, **{**overrides, "model": model})
+
+
+def conn_options(kind: str):
+    from livekit.agents import APIConnectOptions
+
+    timeout, max_retry, retry_interval = CONN_DEFAULTS[kind]
+    return APIConnectOptions(
+        timeout=env_number(f"MINDFLEX_{kind.upper()}_TIMEOUT", timeout),
+        max_retry=env_number(f"MINDFLEX_{kind.upper()}_MAX_RETRY", max_retry, int),
+        retry_interval=retry_interval,
+    )
+
+
+def session_conn_options():
+    # AgentSession(conn_options=...) for the voice pipeline
+    from livekit.agents.voice.agent_session import SessionConnectOptions
+
+    return SessionConnectOptions(
+        stt_conn_options=conn_options("stt"),
+        llm_conn_options=conn_options("llm"),
+        tts_conn_options=conn_options("tts"),
+    )
+
+
+def ttft_slo() -> float:
+    return env_number("MINDFLEX_LLM_TTFT_SLO", 1.5)
+
+
+def preload(extra_modules=()) -> list:
+    # Import the selected plugins (and any extra modules) without building.
+    modules = []
+    for kind, choices in REGISTRY.items():
+        spec = choices[selected(kind)]
+        if isinstance(spec, tuple) and spec[0] not in modules:
+            modules.append(spec[0])
+    modules.extend(m for m in extra_modules if m and m not in modules)
+    for module in modules:
+        importlib.import_module(module)
+    return modules
@@ -0,0 +1,402 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# ---------------------------
+# Post-session recommendation pipeline
+# ---------------------------
+# Runs as its own worker process, never on the agent's event loop:
+#   python recommendations.py run            # poll forever (Gemini)
+#   python recommendations.py run --once     # drain the queue and exit
+# API keys come from .env.local, as for the agent. The stub provider is for
+# tests and dry runs only (--provider stub).
+# Finished conversations are tracked in a durable SQLite queue, processed in
+# batches (one LLM request per batch) on a process pool, and written to
+# ./recommendations/<conversation>.json. Jobs are keyed by file and content
+# hash, so re-running skips work already done and picks up edited files.
+CONVERSATIONS_DIR = "./conversations"
+RECOMMENDATIONS_DIR = "./recommendations"
+QUEUE_PATH = os.path.join(RECOMMENDATIONS_DIR, "queue.db")
+# a job left "running" longer than this is assumed orphaned by a crash
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    conv_file TEXT PRIMARY KEY,
+    content_hash TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at);
+"""
+
+BATCH_PROMPT = """You review transcripts of wellness conversations between a user and MindFlex, a supportive voice assistant.
+For EACH transcript below, return one JSON object with:
+  "summary": 2-3 sentence session summary,
+  "recommendations": 2-4 short, gentle, practical wellness suggestions grounded in what the user said,
+  "follow_up": one question MindFlex could open the next session with.
+Return ONLY a JSON array with one object per transcript, in the same order.
+Never give medical advice.
+"""
+
+
+# ---------------------------
+# Durable work queue
+# ---------------------------
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class WorkQueue:
+    def __init__(self, path: str = QUEUE_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(QUEUE_SCHEMA)
+        # path -> (mtime_ns, size) at the last scan, so polls only hash new or
+        # touched files
+        self._scanned: dict[str, tuple] = {}
+
+    def enqueue(self, conv_file: str, reprocess: bool = False) -> bool:
+        # Returns True if the file (or a changed version of it) needs work.
+        # A job that failed MAX_ATTEMPTS times stays failed until its content
+        # changes or it is reprocessed explicitly.
+        conv_file = os.path.abspath(conv_file)
+        digest = _file_hash(conv_file)
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT content_hash, status FROM jobs WHERE conv_file = ?", (conv_file,)
+            ).fetchone()
+            if row and row[0] == digest and not reprocess:
+                return False
+            self.conn.execute(
+                "INSERT INTO jobs (conv_file, content_hash, status, attempts, updated_at)"
+                " VALUES (?, ?, 'pending', 0, ?) ON CONFLICT (conv_file) DO UPDATE SET"
+                " content_hash = excluded.content_hash, status = 'pending', attempts = 0,"
+                " updated_at = excluded.updated_at, error = NULL",
+                (conv_file, digest, time.time()),
+            )
+        return True
+
+    def scan(self, directory: str = CONVERSATIONS_DIR) -> int:
+        added = 0
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            try:
+                st = os.stat(path)
+                if self._scanned.get(path) == (st.st_mtime_ns, st.st_size):
+                    continue
+                added += self.enqueue(path)
+                self._scanned[path] = (st.st_mtime_ns, st.st_size)
+            except OSError as e:
+                logging.warning(f"Cannot enqueue {path}: {e}")
+        return added
+
+    def claim(self, limit: int) -> list:
+        now = time.time()
+        with self.conn:
+            # recover jobs orphaned by a crashed run
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending' WHERE status = 'running' AND updated_at < ?",
+                (now - LEASE_SECONDS,),
+            )
+            rows = self.conn.execute(
+                "SELECT conv_file FROM jobs WHERE status = 'pending' AND attempts < ?"
+                " ORDER BY updated_at LIMIT ?",
+                (MAX_ATTEMPTS, limit),
+            ).fetchall()
+            files = [r[0] for r in rows]
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?"
+                " WHERE conv_file = ?",
+                [(now, f) for f in files],
+            )
+        return files
+
+    def release(self, conv_files: list) -> None:
+        # back to pending without using up an attempt
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'pending', attempts = MAX(attempts - 1, 0)"
+                " WHERE conv_file = ? AND status = 'running'",
+                [(f,) for f in conv_files],
+            )
+
+    def complete(self, conv_file: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', updated_at = ?, error = NULL WHERE conv_file = ?",
+                (time.time(), conv_file),
+            )
+
+    def fail(self, conv_file: str, error: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " updated_at = ?, error = ? WHERE conv_file = ?",
+                (MAX_ATTEMPTS, time.time(), error[:500], conv_file),
+            )
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+
+def enqueue_conversation(conv_file: str) -> None:
+    # Called by the agent (via a thread) when a session's file is saved.
+    queue = WorkQueue()
+    try:
+        queue.enqueue(conv_file)
+    finally:
+        queue.conn.close()
+
+
+# ---------------------------
+# LLM providers
+# ---------------------------
+class ProviderConfigError(Exception):
+    # Missing or rejected credentials: no batch can succeed until the
+    # configuration is fixed, so jobs must not be charged an attempt.
+    pass
+
+
+class StubProvider:
+    # Deterministic, offline stand-in used by tests and dry runs.
+    def complete_batch(self, transcripts: list) -> list:
+        results = []
+        for transcript in transcripts:
+            user_lines = [line[6:] for line in transcript.splitlines() if line.startswith("user: ")]
+            words = set(re.findall(r"[a-z]+", " ".join(user_lines).lower()))
+            recs = []
+            if words & {"sleep", "sleeping", "tired"}:
+                recs.append("Try a consistent wind-down routine before bed.")
+            if words & {"stress", "stressed", "anxious", "overwhelmed"}:
+                recs.append("Take a few slow breaths when stress builds up.")
+            if words & {"neck", "shoulders", "back", "posture"}:
+                recs.append("Add short stretch breaks through the day.")
+            recs = recs or ["Keep checking in with how you feel each day."]
+            results.append(
+                {
+                    "summary": f"The user shared {len(user_lines)} message(s) during the session.",
+                    "recommendations": recs,
+                    "follow_up": "How have things been since we last spoke?",
+                }
+            )
+        return results
+
+
+class GeminiProvider:
+    def __init__(self, model: str = "gemini-2.5-flash") -> None:
+        self.model = model
+
+    def complete_batch(self, transcripts: list) -> list:
+        from google import genai
+        from google.genai import errors, types
+
+        try:
+            client = genai.Client()
+        except ValueError as e:  # no API key configured
+            raise ProviderConfigError(str(e)) from None
+        body = "\n\n".join(
+            f"### Transcript {i + 1}\n{t}" for i, t in enumerate(transcripts)
+        )
+        try:
+            response = client.models.generate_content(
+                model=self.model,
+                contents=f"{BATCH_PROMPT}\n{body}",
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json", temperature=0.4
+                ),
+            )
+        except errors.ClientError as e:
+            # an invalid key is reported as 400 INVALID_ARGUMENT
+            if e.code in (401, 403) or "API key" in (e.message or ""):
+                raise ProviderConfigError(f"{e.code} {e.message}") from None
+            raise
+        results = json.loads(response.text)
+        if not isinstance(results, list) or len(results) != len(transcripts):
+            raise ValueError("batch response does not match the number of transcripts")
+        return results
+
+
+PROVIDERS = {"stub": StubProvider, "gemini": GeminiProvider}
+
+
+# ---------------------------
+# Batch processing (runs in pool workers)
+# ---------------------------
+def _transcript(conv_file: str) -> str:
+    with open(conv_file, encoding="utf-8") as f:
+        data = json.load(f)
+    records = data.get("conversation", []) if isinstance(data, dict) else data
+    return "\n".join(
+        f"{r['role']}: {r['text']}"
+        for r in records
+        if r.get("role") in ("user", "assistant") and r.get("text")
+    )
+
+
+def output_path(conv_file: str, out_dir: str = RECOMMENDATIONS_DIR) -> str:
+    return os.path.join(out_dir, os.path.basename(conv_file))
+
+
+def process_batch(conv_files: list, provider_name: str, out_dir: str) -> dict:
+    # Returns {conv_file: error or None}.
+    results: dict = {}
+    transcripts, ready = [], []
+    for conv_file in conv_files:
+        try:
+            text = _transcript(conv_file)
+        except (OSError, ValueError) as e:
+            results[conv_file] = str(e)
+            continue
+        if not text:
+            results[conv_file] = None  # nothing said; nothing to recommend
+            continue
+        transcripts.append(text)
+        ready.append(conv_file)
+
+    if ready:
+        try:
+            outputs = PROVIDERS[provider_name]().complete_batch(transcripts)
+        except ProviderConfigError:
+            raise
+        except Exception as e:
+            results.update({f: f"provider error: {e}" for f in ready})
+            return results
+        for conv_file, output in zip(ready, outputs):
+            target = output_path(conv_file, out_dir)
+            tmp = target + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"conversation_file": os.path.basename(conv_file), **output},
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp, target)
+            results[conv_file] = None
+    return results
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+def run(
+    provider: str = "gemini",
+    workers: int = 2,
+    batch_size: int = 8,
+    once: bool = False,
+    poll_interval: float = 5.0,
+    conversations_dir: str = CONVERSATIONS_DIR,
+    out_dir: str = RECOMMENDATIONS_DIR,
+    queue_path: str = QUEUE_PATH,
+) -> dict:
+    queue = WorkQueue(queue_path)
+    metrics = {"batches": 0, "processed": 0, "failed": 0, "batch_seconds": 0.0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            queue.scan(conversations_dir)
+            futures = []
+            for _ in range(workers):
+                batch = queue.claim(batch_size)
+                if not batch:
+                    break
+                futures.append(
+                    (batch, time.perf_counter(), pool.submit(process_batch, batch, provider, out_dir))
+                )
+
+            config_error = None
+            for batch, submitted, future in futures:
+                try:
+                    outcome = future.result()
+                except ProviderConfigError as e:
+                    queue.release(batch)
+                    config_error = e
+                    continue
+                except Exception as e:
+                    # a crashed worker or an unexpected error fails the whole batch
+                    outcome = {f: f"batch error: {e!r}" for f in batch}
+                metrics["batches"] += 1
+                metrics["batch_seconds"] += time.perf_counter() - submitted
+                for conv_file, error in outcome.items():
+                    if error is None:
+                        queue.complete(conv_file)
+                        metrics["processed"] += 1
+                    else:
+                        queue.fail(conv_file, error)
+                        metrics["failed"] += 1
+                        logging.warning(f"Recommendation job failed for {conv_file}: {error}")
+
+            if futures:
+                _write_metrics(metrics, started, queue, out_dir)
+            if config_error is not None:
+                # every batch would fail the same way: stop with the jobs
+                # still pending rather than burn their attempts
+                raise config_error
+            if futures:
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    return _write_metrics(metrics, started, queue, out_dir)
+
+
+def _write_metrics(metrics: dict, started: float, queue: WorkQueue, out_dir: str) -> dict:
+    # Rewritten after every round, so a polling run reports as it goes.
+    elapsed = time.perf_counter() - started
+    metrics["elapsed_seconds"] = round(elapsed, 3)
+    metrics["conversations_per_second"] = round(metrics["processed"] / elapsed, 2) if elapsed else 0.0
+    metrics["mean_batch_seconds"] = (
+        round(metrics["batch_seconds"] / metrics["batches"], 3) if metrics["batches"] else None
+    )
+    metrics["queue"] = queue.counts()
+    target = os.path.join(out_dir, "metrics.json")
+    with open(target + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(target + ".tmp", target)
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run")
+    run_cmd.add_argument("--provider", choices=sorted(PROVIDERS), default="gemini")
+    run_cmd.add_argument("--workers", type=int, default=2)
+    run_cmd.add_argument("--batch-size", type=int, default=8)
+    run_cmd.add_argument("--once", action="store_true")
+    enqueue_cmd = sub.add_parser("reprocess")
+    enqueue_cmd.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv(".env.local")  # same keys as the agent (init_runtime)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "reprocess":
+        queue = WorkQueue()
+        for path in args.files:
+            queue.enqueue(path, reprocess=True)
+    else:
+        try:
+            metrics = run(args.provider, args.workers, args.batch_size, args.once)
+        except ProviderConfigError as e:
+            raise SystemExit(f"Provider configuration error (jobs left pending): {e}")
+        print(json.dumps(metrics, indent=2))
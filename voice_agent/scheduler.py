@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+
+# ---------------------------
+# Supervised per-session task scheduler
+# ---------------------------
+# Reply-producing work (anything that ends in generate_reply) runs strictly
+# one at a time, in submission order. Queued work carries a coalescing key:
+# a newer submission with the same key replaces the stale one still waiting,
+# and when the queue is full the oldest waiting job is dropped. Everything
+# else the session fires off goes through spawn() so it is tracked and
+# cancelled with the session instead of outliving the room.
+class _Job:
+    __slots__ = ("key", "factory", "submitted_at")
+
+    def __init__(self, key: str | None, factory) -> None:
+        self.key = key
+        self.factory = factory
+        self.submitted_at = time.monotonic()
+
+
+class SessionScheduler:
+    def __init__(self, max_queue: int = 4) -> None:
+        self._max_queue = max_queue
+        self._pending: deque[_Job] = deque()
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+        self.stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "max_depth": 0,
+            "max_wait_ms": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, factory, key: str | None = None) -> bool:
+        # `factory` is a zero-arg callable returning the coroutine to run, so
+        # superseded or dropped jobs never create a coroutine at all.
+        if self._closed:
+            return False
+        self.stats["submitted"] += 1
+
+        if key is not None:
+            for i, job in enumerate(self._pending):
+                if job.key == key:
+                    del self._pending[i]
+                    self.stats["coalesced"] += 1
+                    break
+
+        if len(self._pending) >= self._max_queue:
+            self._pending.popleft()
+            self.stats["dropped"] += 1
+            logging.warning(
+                f"Scheduler queue full ({self._max_queue}); dropped oldest reply job"
+            )
+
+        self._pending.append(_Job(key, factory))
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self._pending))
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return True
+
+    def spawn(self, coro) -> asyncio.Task | None:
+        if self._closed:
+            coro.close()
+            return None
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Session task failed: {task.exception()}")
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job = self._pending.popleft()
+            wait_ms = (time.monotonic() - job.submitted_at) * 1000
+            self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+            try:
+                await job.factory()
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logging.error(f"Reply job '{job.key}' failed: {e}")
+
+    async def aclose(self) -> None:
+        # Drop queued replies and cancel everything still running.
+        self._closed = True
+        self.stats["cancelled"] += len(self._pending)
+        self._pending.clear()
+
+        tasks = list(self._tasks)
+        if self._worker is not None:
+            tasks.append(self._worker)
+            self._worker = None
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,37 @@
+import pytest
+
+from conversation_store import ConversationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "store.db"))
+    store.save_session(
+        {
+            "user_id": "u1",
+            "room": "r1",
+            "started_at": 1.0,
+            "ended_at": 2.0,
+            "records": [
+                {"role": "user", "text": "I don't sleep well when I'm stressed"},
+                {"role": "assistant", "text": "Let's try a short breathing exercise."},
+            ],
+        }
+    )
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("query", ["don't", 'say "hi', "sleep AND (", "stress*", "NEAR("])
+def test_search_accepts_raw_user_text(store, query):
+    store.search(query)
+    store.search(query, user_id="u1")
+
+
+def test_search_matches_all_words(store):
+    assert [r["text"] for r in store.search("don't sleep")] == [
+        "I don't sleep well when I'm stressed"
+    ]
+    assert store.search("breathing", user_id="u1")[0]["role"] == "assistant"
+    assert store.search("breathing", user_id="u2") == []
+    assert store.search("   ") == []
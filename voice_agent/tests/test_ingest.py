@@ -0,0 +1,18 @@
+import pytest
+
+from ingest import decode_packet
+
+
+def test_chat_packet():
+    packet = decode_packet(b'{"type": "chat", "text": "  hello  "}')
+    assert packet.kind == "chat" and packet.text == "hello"
+
+
+@pytest.mark.parametrize("payload", [b"[1,2]", b"42", b"null", b'"text"', b"   ", b""])
+def test_non_message_payloads_are_dropped(payload):
+    assert decode_packet(payload) is None
+
+
+@pytest.mark.parametrize("payload", [b"hello there", b"no thanks", b"{not json"])
+def test_plain_text(payload):
+    assert decode_packet(payload).kind == "text"
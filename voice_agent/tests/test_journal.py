@@ -0,0 +1,22 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from journal import ConversationJournal
+
+
+@pytest.mark.parametrize("room_name", ["../escaped", "a/b", "..", ""])
+def test_room_name_stays_inside_directory(tmp_path, room_name):
+    async def session():
+        journal = ConversationJournal(str(tmp_path), room_name=room_name)
+        journal.start()
+        journal.append({"role": "user", "text": "hi"})
+        return journal, await journal.close(room_name, "20260101_120000")
+
+    journal, conv_file = asyncio.run(session())
+    for path in (journal.path, conv_file):
+        assert os.path.dirname(path) == str(tmp_path)
+    with open(conv_file, encoding="utf-8") as f:
+        assert json.load(f)["conversation"][0]["text"] == "hi"
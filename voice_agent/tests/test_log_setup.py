@@ -0,0 +1,26 @@
+import contextvars
+import logging.handlers
+
+import log_setup
+
+
+def test_callback_keeps_tags_of_its_session():
+    def session(room):
+        log_setup.bind_log_context(room=room, session=f"job_{room}")
+        return log_setup.with_log_context(lambda: log_setup._log_context.get()["room"])
+
+    callbacks = [contextvars.copy_context().run(session, room) for room in ("a", "b")]
+    # fired from the emitter's context, after both sessions were bound
+    assert [callback() for callback in callbacks] == ["a", "b"]
+
+
+def test_only_the_main_process_rotates(tmp_path):
+    path = str(tmp_path / "app.log")
+    rotating = log_setup._build_file_handler(path, 1024, 2, None, rotate=True)
+    appending = log_setup._build_file_handler(path, 1024, 2, "midnight", rotate=False)
+    try:
+        assert isinstance(rotating, logging.handlers.RotatingFileHandler)
+        assert type(appending) is logging.handlers.WatchedFileHandler
+    finally:
+        rotating.close()
+        appending.close()
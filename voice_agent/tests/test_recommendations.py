@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import recommendations
+from recommendations import MAX_ATTEMPTS, ProviderConfigError, WorkQueue
+
+
+def write_conversation(path, records):
+    path.write_text(json.dumps({"conversation": records}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def conv_dir(tmp_path):
+    directory = tmp_path / "conversations"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    yield queue
+    queue.conn.close()
+
+
+def status(queue, conv_file):
+    return queue.conn.execute(
+        "SELECT status, attempts FROM jobs WHERE conv_file = ?", (os.path.abspath(conv_file),)
+    ).fetchone()
+
+
+def test_claim_and_complete(queue, conv_dir):
+    conv = write_conversation(conv_dir / "a.json", [{"role": "user", "text": "hi"}])
+    assert queue.scan(str(conv_dir)) == 1
+    assert queue.claim(8) == [os.path.abspath(conv)]
+    assert queue.claim(8) == []  # leased
+    queue.complete(os.path.abspath(conv))
+    assert status(queue, conv) == ("done", 1)
+    assert queue.enqueue(conv) is False
+
+
+def test_fail_retries_then_stays_failed(queue, conv_dir):
+    conv = write_conversation(conv_dir / "a.json", [])
+    queue.enqueue(conv)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        assert queue.claim(8) == [os.path.abspath(conv)]
+        queue.fail(os.path.abspath(conv), "boom")
+        assert status(queue, conv) == ("pending" if attempt < MAX_ATTEMPTS else "failed", attempt)
+    # the same content is not queued again
+    assert queue.enqueue(conv) is False
+    assert queue.claim(8) == []
+
+
+def test_failed_job_requeued_on_change_or_reprocess(queue, conv_dir):
+    conv = write_conversation(conv_dir / "a.json", [])
+    queue.enqueue(conv)
+    for _ in range(MAX_ATTEMPTS):
+        queue.claim(8)
+        queue.fail(os.path.abspath(conv), "boom")
+    assert queue.enqueue(conv, reprocess=True) is True
+    assert status(queue, conv) == ("pending", 0)
+    queue.claim(8)
+    queue.complete(os.path.abspath(conv))
+    write_conversation(conv_dir / "a.json", [{"role": "user", "text": "edited"}])
+    assert queue.enqueue(conv) is True
+
+
+def test_expired_lease_is_claimed_again(queue, conv_dir):
+    conv = write_conversation(conv_dir / "a.json", [])
+    queue.enqueue(conv)
+    assert queue.claim(8)
+    with queue.conn:
+        queue.conn.execute(
+            "UPDATE jobs SET updated_at = ?", (time.time() - recommendations.LEASE_SECONDS - 1,)
+        )
+    assert queue.claim(8) == [os.path.abspath(conv)]
+    assert status(queue, conv) == ("running", 2)
+
+
+def test_reprocess_is_idempotent(queue, conv_dir):
+    conv = write_conversation(conv_dir / "a.json", [])
+    queue.enqueue(conv)
+    queue.enqueue(conv, reprocess=True)
+    queue.enqueue(conv, reprocess=True)
+    assert queue.counts() == {"pending": 1}
+    assert queue.claim(8) == [os.path.abspath(conv)]
+
+
+def test_scan_skips_unchanged_files(queue, conv_dir, monkeypatch):
+    write_conversation(conv_dir / "a.json", [])
+    queue.scan(str(conv_dir))
+    hashed = []
+    monkeypatch.setattr(recommendations, "_file_hash", lambda p: hashed.append(p) or "x")
+    assert queue.scan(str(conv_dir)) == 0
+    assert hashed == []
+
+
+def test_run_once_finishes_with_failing_files(tmp_path, conv_dir):
+    write_conversation(
+        conv_dir / "good.json",
+        [{"role": "user", "text": "I can't sleep"}, {"role": "assistant", "text": "Let's look at that."}],
+    )
+    (conv_dir / "broken.json").write_text("{not json", encoding="utf-8")
+    # records that aren't objects raise inside the worker, not per file
+    write_conversation(conv_dir / "odd.json", [1])
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    metrics = recommendations.run(
+        provider="stub",
+        workers=1,
+        batch_size=1,
+        once=True,
+        conversations_dir=str(conv_dir),
+        out_dir=str(out_dir),
+        queue_path=str(tmp_path / "queue.db"),
+    )
+
+    assert metrics["processed"] == 1
+    assert metrics["failed"] == 2 * MAX_ATTEMPTS
+    assert metrics["queue"] == {"done": 1, "failed": 2}
+    assert json.loads((out_dir / "good.json").read_text())["recommendations"]
+    assert json.loads((out_dir / "metrics.json").read_text())["processed"] == 1
+
+
+def test_config_error_stops_without_using_attempts(tmp_path, conv_dir, monkeypatch):
+    class NoKey:
+        def complete_batch(self, transcripts):
+            raise ProviderConfigError("no API key")
+
+    # the provider must be visible to the workers
+    monkeypatch.setattr(recommendations, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setitem(recommendations.PROVIDERS, "nokey", NoKey)
+    conv = write_conversation(conv_dir / "a.json", [{"role": "user", "text": "hi"}])
+    queue_path = str(tmp_path / "queue.db")
+
+    for _ in range(MAX_ATTEMPTS + 1):
+        with pytest.raises(ProviderConfigError):
+            recommendations.run(
+                provider="nokey",
+                workers=1,
+                once=True,
+                conversations_dir=str(conv_dir),
+                out_dir=str(tmp_path),
+                queue_path=queue_path,
+            )
+
+    queue = WorkQueue(queue_path)
+    try:
+        assert status(queue, conv) == ("pending", 0)
+    finally:
+        queue.conn.close()
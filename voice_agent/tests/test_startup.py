@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import bench_startup  # noqa: E402
+
+
+def test_stubbed_startup_imports_no_plugins(tmp_path):
+    # fresh interpreter: import agent -> init_runtime -> prewarm with stand-ins
+    result = bench_startup.run_once(real=False, workdir=str(tmp_path))
+    assert result["plugins_at_import"] == []
+    assert {"vad", "stt", "tts", "llm", "tts_cache", "conversation_store"} <= set(result["prewarmed"])
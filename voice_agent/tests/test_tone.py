@@ -0,0 +1,37 @@
+import pytest
+
+from tone import ToneState, classify, classify_batch
+
+
+@pytest.mark.parametrize(
+    "text, label",
+    [
+        ("I'm so tired today", "low"),
+        ("feeling great", "high"),
+        ("not good at all", "low"),
+        ("I don't feel good", "low"),
+        ("I'm not stressed anymore", "neutral"),
+        ("No, I'm good", "high"),
+        ("no im fine thanks", "high"),
+        ("Not really, I'm doing well", "high"),
+        ("no, not good", "low"),
+        ("downloading the app now", "neutral"),
+        ("farewell", "neutral"),
+        ("I’m not fine", "low"),
+    ],
+)
+def test_classify(text, label):
+    assert classify(text) == label
+
+
+def test_classify_batch_matches_classify():
+    texts = ["No, I'm good", "so stressed", "hello"]
+    assert classify_batch(texts) == [classify(t) for t in texts]
+
+
+def test_tone_state_smooths_single_outliers():
+    state = ToneState()
+    for _ in range(5):
+        state.update("feeling great")
+    assert state.label == "high"
+    assert state.update("tired") != "low"
@@ -0,0 +1,57 @@
+import pytest
+
+from vision import VideoPolicy
+
+
+@pytest.mark.parametrize(
+    "assistant",
+    [
+        "Would you like me to use visual mood tracking to follow along?",
+        "Is it okay if I use your camera, so I can check your posture?",
+        "Want some visual posture guidance while we stretch?",
+    ],
+)
+def test_yes_after_camera_offer_grants(assistant):
+    policy = VideoPolicy()
+    policy.note_assistant(assistant)
+    policy.note_user("Yes please")
+    assert policy.consent
+
+
+@pytest.mark.parametrize(
+    "assistant",
+    [
+        "Hey, nice to see you again! How are you feeling today?",
+        "Good to see you. Ready to start?",
+        "I can offer visual guidance if you turn on your camera.",
+    ],
+)
+def test_yes_after_other_questions_does_not_grant(assistant):
+    policy = VideoPolicy()
+    policy.note_assistant(assistant)
+    policy.note_user("Yes")
+    assert not policy.consent
+
+
+@pytest.mark.parametrize(
+    "user, granted",
+    [
+        ("You can use my camera", True),
+        ("feel free to turn on the video", True),
+        ("you can see me now", True),
+        ("You can use that breathing trick later", False),
+        ("please watch your tone", False),
+    ],
+)
+def test_explicit_grant_needs_a_camera(user, granted):
+    policy = VideoPolicy()
+    policy.note_user(user)
+    assert policy.consent is granted
+
+
+def test_no_after_offer_revokes():
+    policy = VideoPolicy()
+    policy.set_consent(True)
+    policy.note_assistant("Should I keep using the camera?")
+    policy.note_user("no thanks")
+    assert not policy.consent
@@ -0,0 +1,115 @@
+import re
+
+
+# ---------------------------
+# Tone classifier
+# ---------------------------
+# Built once at import: a compiled word tokenizer plus a single lexicon table
+# mapping each cue word or negator to its class, so a message is scanned in
+# one pass with whole-word lookups. "down" no longer fires inside "download",
+# nor "well" inside "farewell", and "not good" reads as low energy. As
+# before, any low cue outranks a high one.
+LOW_WORDS = (
+    "tired",
+    "tiring",
+    "exhausted",
+    "stressed",
+    "stressing",
+    "stressful",
+    "sad",
+    "anxious",
+    "worried",
+    "down",
+    "depressed",
+    "overwhelmed",
+)
+HIGH_WORDS = ("good", "great", "energized", "happy", "awesome", "fine", "well")
+NEGATORS = (
+    "not",
+    "never",
+    "no",
+    "isn't",
+    "wasn't",
+    "don't",
+    "didn't",
+    "hardly",
+)
+# a negator applies to a cue up to this many words after it ("not very good")
+NEGATION_WINDOW = 2
+# words that open a new clause; like punctuation they end a negation's scope,
+# so "no, I'm good" and "no im fine thanks" read as high
+CLAUSE_STARTERS = ("i", "i'm", "im", "i've", "ive", "but", "though", "although")
+
+_NEG, _LOW, _HIGH, _CLAUSE = 0, 1, 2, 3
+_LEXICON = {
+    **{w: _LOW for w in LOW_WORDS},
+    **{w: _HIGH for w in HIGH_WORDS},
+    **{w: _NEG for w in NEGATORS},
+    **{w: _CLAUSE for w in CLAUSE_STARTERS},
+    **{p: _CLAUSE for p in ".,;:!?"},
+}
+_WORD_RE = re.compile(r"[a-z']+|[.,;:!?]")
+
+
+def score(text: str) -> int:
+    # -1 low, +1 high, 0 neutral
+    high = False
+    negated = 0
+    lookup = _LEXICON.get
+    for word in _WORD_RE.findall(text.lower().replace("’", "'")):
+        kind = lookup(word)
+        if kind is None:
+            if negated:
+                negated -= 1
+            continue
+        if kind == _NEG:
+            negated = NEGATION_WINDOW
+            continue
+        if kind == _CLAUSE:
+            negated = 0
+            continue
+        if negated:
+            negated = 0
+            # "not good" -> low; "not stressed" carries no signal
+            if kind == _HIGH:
+                return -1
+            continue
+        if kind == _LOW:
+            return -1
+        high = True
+    return 1 if high else 0
+
+
+_LABELS = {-1: "low", 0: "neutral", 1: "high"}
+
+
+def classify(text: str) -> str:
+    return _LABELS[score(text)]
+
+
+def classify_batch(texts) -> list:
+    return [_LABELS[score(t)] for t in texts]
+
+
+# ---------------------------
+# Session-level tone state
+# ---------------------------
+class ToneState:
+    # Exponentially smoothed over the user's utterances, so one stray word
+    # doesn't swing the reply energy back and forth.
+    def __init__(self, alpha: float = 0.4, threshold: float = 0.3) -> None:
+        self.alpha = alpha
+        self.threshold = threshold
+        self.value = 0.0
+
+    def update(self, text: str) -> str:
+        self.value += self.alpha * (score(text) - self.value)
+        return self.label
+
+    @property
+    def label(self) -> str:
+        if self.value <= -self.threshold:
+            return "low"
+        if self.value >= self.threshold:
+            return "high"
+        return "neutral"
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import wave
+from collections import OrderedDict
+
+from prompts import MENTAL_SESSION_INSTRUCTION, PHYSICAL_SESSION_INSTRUCTION
+
+
+# ---------------------------
+# Scripted lines
+# ---------------------------
+# Lines the prompts script word for word, pulled out once at import so the
+# cache and the prompts can't drift apart.
+def _scripted_opener(instruction: str) -> str:
+    m = re.search(r'Begin the conversation by saying:\s*"([^"]+)"', instruction)
+    return m.group(1).strip() if m else ""
+
+
+def _safety_note(instruction: str) -> str:
+    m = re.search(r"\*\*Safety Note:\*\*\s*(.+?)\n\s*\n", instruction, re.S)
+    return " ".join(m.group(1).split()) if m else ""
+
+
+SCRIPTED_LINES = {
+    # the physical opener is said by the LLM's switch reply (instructions.py)
+    "opener:mental": _scripted_opener(MENTAL_SESSION_INSTRUCTION),
+    "already:mental": "We’re already in mental mode — let’s continue from here.",
+    "already:physical": "We’re already in physical mode — let’s continue from here.",
+    "safety_note": _safety_note(PHYSICAL_SESSION_INSTRUCTION),
+}
+
+
+def tts_identity(tts) -> tuple:
+    # (voice, model, sample_rate) of a TTS instance, as used in cache keys
+    opts = getattr(tts, "_opts", None)
+    voice = getattr(opts, "voice", None)
+    if isinstance(voice, list):
+        voice = ",".join(f"{v:.4f}" for v in voice)
+    return (
+        str(voice),
+        str(getattr(tts, "model", "unknown")),
+        int(getattr(tts, "sample_rate", 24000)),
+    )
+
+
+# ---------------------------
+# On-disk audio cache
+# ---------------------------
+# Rendered audio is stored as 16-bit WAV files named by a hash of
+# (text, voice, model, sample_rate). The in-memory index is only key -> size
+# in LRU order; file mtimes carry that order across restarts.
+class TTSAudioCache:
+    def __init__(
+        self,
+        directory: str = "./tts_cache",
+        max_bytes: int = 64 * 1024 * 1024,
+        frame_ms: int = 100,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.frame_ms = frame_ms
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".wav"):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, sample_rate: int) -> str:
+        raw = json.dumps([text, voice, model, sample_rate], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def contains(self, text: str, tts) -> bool:
+        return self.key(text, *tts_identity(tts)) in self._index
+
+    async def get_frames(self, text: str, tts) -> list | None:
+        key = self.key(text, *tts_identity(tts))
+        if key not in self._index:
+            self.stats["misses"] += 1
+            return None
+        try:
+            frames = await asyncio.to_thread(self._read, key)
+        except OSError as e:
+            logging.warning(f"TTS cache entry unreadable, dropping it: {e}")
+            self._drop(key)
+            self.stats["misses"] += 1
+            return None
+        self._index.move_to_end(key)
+        self.stats["hits"] += 1
+        return frames
+
+    def _read(self, key: str) -> list:
+        from livekit import rtc
+
+        path = self._path(key)
+        os.utime(path)  # persist LRU position
+        with wave.open(path, "rb") as w:
+            sample_rate = w.getframerate()
+            channels = w.getnchannels()
+            samples = sample_rate * self.frame_ms // 1000
+            frames = []
+            while True:
+                data = w.readframes(samples)
+                if not data:
+                    break
+                frames.append(
+                    rtc.AudioFrame(
+                        data=data,
+                        sample_rate=sample_rate,
+                        num_channels=channels,
+                        samples_per_channel=len(data) // (2 * channels),
+                    )
+                )
+        return frames
+
+    async def put(self, text: str, tts, frames: list) -> None:
+        if not frames:
+            return
+        key = self.key(text, *tts_identity(tts))
+        size = await asyncio.to_thread(self._write, key, frames)
+        self._drop(key)
+        self._index[key] = size
+        self._size += size
+        while self._size > self.max_bytes and len(self._index) > 1:
+            old_key = next(iter(self._index))
+            self._drop(old_key)
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def _write(self, key: str, frames: list) -> int:
+        path = self._path(key)
+        tmp = path + ".tmp"
+        with wave.open(tmp, "wb") as w:
+            w.setnchannels(frames[0].num_channels)
+            w.setsampwidth(2)
+            w.setframerate(frames[0].sample_rate)
+            for frame in frames:
+                w.writeframes(bytes(frame.data))
+        os.replace(tmp, path)
+        return os.path.getsize(path)
+
+    def _drop(self, key: str) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    async def render(self, tts, text: str) -> None:
+        frames = []
+        async with tts.synthesize(text) as stream:
+            async for audio in stream:
+                frames.append(audio.frame)
+        await self.put(text, tts, frames)
+
+    async def warm(self, tts, texts=None) -> int:
+        rendered = 0
+        for text in texts or SCRIPTED_LINES.values():
+            if not text or self.contains(text, tts):
+                continue
+            await self.render(tts, text)
+            rendered += 1
+        return rendered
+
+
+async def play_scripted(session, cache: TTSAudioCache | None, tts, text: str):
+    # Speak a fixed line without an LLM round trip; cached audio skips TTS too.
+    frames = await cache.get_frames(text, tts) if cache is not None else None
+    if frames is None:
+        return session.say(text)
+
+    async def audio():
+        for frame in frames:
+            yield frame
+
+    return session.say(text, audio=audio())
+
+
+# ---------------------------
+# Warm-up command
+# ---------------------------
+# python tts_cache.py warm  -- pre-render SCRIPTED_LINES with the agent's TTS
+async def _warm_main() -> None:
+    import aiohttp
+
+    import agent
+    import providers
+
+    agent.init_runtime()  # API keys from .env.local
+    async with aiohttp.ClientSession() as http:
+        tts = providers.build("tts", http_session=http)
+        cache = TTSAudioCache()
+        rendered = await cache.warm(tts)
+        await tts.aclose()
+    print(f"Rendered {rendered} scripted line(s) into {cache.directory}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["warm"]:
+        print("usage: python tts_cache.py warm")
+        sys.exit(2)
+    asyncio.run(_warm_main())
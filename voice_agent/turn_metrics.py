@@ -0,0 +1,321 @@
+import asyncio
+import bisect
+import fcntl
+import json
+import logging
+import os
+import time
+from collections import deque
+
+
+# ---------------------------
+# Per-turn latency instrumentation
+# ---------------------------
+# A turn is stamped at each stage of the voice pipeline:
+#   vad_end -> final_transcript -> reply_issued -> llm_first_token
+#   -> tts_first_audio -> playout_end
+# and the gaps between them are fed into per-session and per-worker
+# histograms. Events are read duck-typed so the timer works with both the
+# livekit session and the load-test fakes.
+STAGES = (
+    "vad_end",
+    "final_transcript",
+    "reply_issued",
+    "llm_first_token",
+    "tts_first_audio",
+    "playout_end",
+)
+
+# (histogram name, from stage, to stage)
+INTERVALS = (
+    ("endpointing", "vad_end", "final_transcript"),
+    ("reply_dispatch", "final_transcript", "reply_issued"),
+    ("llm_ttft", "reply_issued", "llm_first_token"),
+    ("tts_first_audio", "reply_issued", "tts_first_audio"),
+    ("response_latency", "vad_end", "tts_first_audio"),
+    ("playout", "tts_first_audio", "playout_end"),
+)
+
+# Seconds; tuned around a sub-second voice response target.
+DEFAULT_BUCKETS = (
+    0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricSet:
+    def __init__(self) -> None:
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+
+    def observe(self, name: str, value: float) -> None:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.observe(value)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> dict:
+        return {
+            "latency_seconds": {
+                name: hist.summary() for name, hist in self.histograms.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+# One per process; with one job per process this is also the worker view
+# the textfile exporter publishes.
+WORKER_METRICS = MetricSet()
+
+
+class TurnTimer:
+    def __init__(
+        self,
+        worker_metrics: MetricSet = WORKER_METRICS,
+        recent_turns: int = 20,
+    ) -> None:
+        self.metrics = MetricSet()
+        self._worker_metrics = worker_metrics
+        self._turn: dict | None = None
+        self.recent = deque(maxlen=recent_turns)
+
+    # ---------------------------
+    # Stamping
+    # ---------------------------
+    def mark(self, stage: str, at: float | None = None) -> None:
+        if self._turn is None:
+            self._turn = {"interrupted": False}
+        # First stamp wins: re-emitted events must not move a stage later.
+        self._turn.setdefault(stage, time.time() if at is None else at)
+
+    def _observe(self, name: str, value: float) -> None:
+        self.metrics.observe(name, value)
+        self._worker_metrics.observe(name, value)
+
+    def _incr(self, name: str) -> None:
+        self.metrics.incr(name)
+        self._worker_metrics.incr(name)
+
+    def finish_turn(self) -> dict | None:
+        turn, self._turn = self._turn, None
+        if not turn:
+            return None
+        for name, start, end in INTERVALS:
+            if start in turn and end in turn and turn[end] >= turn[start]:
+                self._observe(name, turn[end] - turn[start])
+        self._incr("turns")
+        if turn["interrupted"]:
+            self._incr("turns_interrupted")
+        self.recent.append(turn)
+        return turn
+
+    # ---------------------------
+    # Session event handlers
+    # ---------------------------
+    def on_user_state_changed(self, event) -> None:
+        if event.old_state == "speaking" and event.new_state != "speaking":
+            if self._turn and "tts_first_audio" not in self._turn:
+                # user paused and carried on (any speculative reply was
+                # dropped unheard): time from their last stop
+                self._turn = None
+            elif self._turn:
+                # user spoke again over an in-flight reply: close it out
+                self._turn["interrupted"] = True
+                self.finish_turn()
+            self.mark("vad_end", event.created_at)
+
+    def on_user_input_transcribed(self, event) -> None:
+        if event.is_final and event.transcript.strip():
+            self.mark("final_transcript", event.created_at)
+
+    def on_speech_created(self, event) -> None:
+        self.mark("reply_issued", event.created_at)
+
+    def on_metrics_collected(self, event) -> None:
+        m = event.metrics
+        if getattr(m, "type", None) == "llm_metrics" and self._turn:
+            issued = self._turn.get("reply_issued")
+            if issued is not None:
+                self.mark("llm_first_token", issued + m.ttft)
+        elif getattr(m, "type", None) == "tts_metrics":
+            self._observe("tts_ttfb", m.ttfb)
+
+    def on_agent_state_changed(self, event) -> None:
+        if event.new_state == "speaking":
+            self.mark("tts_first_audio", event.created_at)
+        elif event.old_state == "speaking":
+            self.mark("playout_end", event.created_at)
+            self.finish_turn()
+
+    def on_conversation_item_added(self, event) -> None:
+        item = event.item
+        if getattr(item, "role", None) == "assistant" and item.interrupted:
+            if self._turn is not None and "reply_issued" in self._turn:
+                self._turn["interrupted"] = True
+            elif self.recent and not self.recent[-1]["interrupted"]:
+                # playout already ended; patch the turn it belonged to
+                self.recent[-1]["interrupted"] = True
+                self._incr("turns_interrupted")
+
+    def attach(self, session) -> None:
+        session.on("user_state_changed", self.on_user_state_changed)
+        session.on("user_input_transcribed", self.on_user_input_transcribed)
+        session.on("speech_created", self.on_speech_created)
+        session.on("metrics_collected", self.on_metrics_collected)
+        session.on("agent_state_changed", self.on_agent_state_changed)
+        session.on("conversation_item_added", self.on_conversation_item_added)
+
+    def summary(self) -> dict:
+        return self.metrics.summary()
+
+
+# ---------------------------
+# Prometheus textfile exporter
+# ---------------------------
+# Turn stage histograms are one family (mindflex_turn_*_seconds); the rest
+# (speculation, providers) are named after their own metric.
+TURN_HISTOGRAMS = frozenset(name for name, _, _ in INTERVALS) | {"tts_ttfb"}
+
+
+def _histogram_family(name: str) -> str:
+    if name in TURN_HISTOGRAMS:
+        return f"mindflex_turn_{name}_seconds"
+    return f"mindflex_{name}_seconds"
+
+
+def render_prometheus(metrics: MetricSet, labels: dict | None = None) -> str:
+    label_str = ",".join(f'{k}="{v}"' for k, v in (labels or {}).items())
+    series_labels = f"{{{label_str}}}" if label_str else ""
+    lines = []
+    for name, hist in sorted(metrics.histograms.items()):
+        metric = _histogram_family(name)
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(
+                f"{metric}_bucket{{{label_str + ',' if label_str else ''}{le}}} {cumulative}"
+            )
+        lines.append(f"{metric}_sum{series_labels} {hist.sum}")
+        lines.append(f"{metric}_count{series_labels} {hist.count}")
+    for name, value in sorted(metrics.counters.items()):
+        metric = f"mindflex_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{series_labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot(metrics: MetricSet) -> dict:
+    return {
+        "histograms": {
+            name: {"buckets": list(h.buckets), "counts": h.counts, "sum": h.sum}
+            for name, h in metrics.histograms.items()
+        },
+        "counters": dict(metrics.counters),
+    }
+
+
+def _merge(total: MetricSet, snapshot: dict) -> None:
+    for name, h in snapshot["histograms"].items():
+        hist = total.histograms.get(name)
+        if hist is None:
+            hist = total.histograms[name] = Histogram(h["buckets"])
+        hist.counts = [a + b for a, b in zip(hist.counts, h["counts"])]
+        hist.count += sum(h["counts"])
+        hist.sum += h["sum"]
+    for name, value in snapshot["counters"].items():
+        total.incr(name, value)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_textfile(metrics: MetricSet, directory: str = "./metrics") -> str:
+    # One aggregated file per worker. Each job process stores its latest
+    # cumulative snapshot in a shared state file (under a lock) and renders
+    # the sum; snapshots of exited processes are folded into a retired
+    # total, so finished jobs keep counting without a series per pid.
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "mindflex.prom")
+    state_path = os.path.join(directory, ".mindflex_state.json")
+    with open(os.path.join(directory, ".mindflex_state.lock"), "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {"retired": _snapshot(MetricSet()), "live": {}}
+        state["live"][str(os.getpid())] = _snapshot(metrics)
+
+        retired = MetricSet()
+        _merge(retired, state["retired"])
+        for pid in [p for p in state["live"] if not _pid_alive(int(p))]:
+            _merge(retired, state["live"].pop(pid))
+        state["retired"] = _snapshot(retired)
+        total = retired
+        for snapshot in state["live"].values():
+            _merge(total, snapshot)
+
+        for target, text in ((state_path, json.dumps(state)), (path, render_prometheus(total))):
+            tmp = target + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, target)
+    return path
+
+
+async def export_worker_metrics(directory: str = "./metrics") -> None:
+    try:
+        await asyncio.to_thread(write_textfile, WORKER_METRICS, directory)
+    except Exception as e:
+        logging.error(f"Failed to export turn metrics: {e}")
+
+
+async def run_exporter(directory: str = "./metrics", interval: float = 15.0) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await export_worker_metrics(directory)
@@ -0,0 +1,192 @@
+import logging
+import re
+import time
+
+
+# ---------------------------
+# Video ingest policy
+# ---------------------------
+# Passed to AgentSession as its video_sampler, so it sees every decoded camera
+# frame and decides which ones are kept. Nothing is kept until the user agrees
+# to camera use (the room's video input is detached until then, so frames are
+# not even decoded). After consent, frames are rate-limited per mode, reduced
+# to a tiny luma grid and dropped if they barely differ from the last kept
+# frame. The newest kept frame is attached to the next user turn by
+# Assistant.on_user_turn_completed, downscaled at encode time.
+DEFAULT_FPS = {"mental": 0.2, "physical": 1.0}
+INFERENCE_SIZE = 512  # longest side of the image sent to the LLM
+GRID = 16  # change-detection grid (GRID x GRID luma samples)
+CHANGE_THRESHOLD = 6.0  # mean absolute luma difference, 0-255
+
+_CAMERA = r"(?:the |my )?(?:camera|video|webcam)"
+_GRANT_RE = re.compile(
+    rf"\b(?:(?:you can|go ahead and|feel free to|please) (?:use|turn on|look through|watch) {_CAMERA}"
+    r"|use my (?:camera|video)|turn on (?:the|my) (?:camera|video)"
+    r"|you can (?:see|watch) me)\b"
+)
+_REVOKE_RE = re.compile(
+    r"\b(?:(?:don'?t|do not|stop|please don'?t) (?:use|using|watch|watching|look|looking)"
+    r"|turn off (?:the|my) (?:camera|video)|no (?:camera|video))\b"
+)
+_YES_RE = re.compile(r"^(?:yes|yeah|yep|sure|okay|ok|of course|go ahead|please do|absolutely)\b")
+_NO_RE = re.compile(r"^(?:no|nope|not now|no thanks|i'?d rather not)\b")
+# a question about the camera or visual guidance, not just a greeting like
+# "nice to see you"
+_OFFER_RE = re.compile(
+    r"\b(?:camera|video|visual (?:mood tracking|posture|movement|guidance)"
+    r"|(?:posture|movement) guidance)\b[^.!?]*\?"
+)
+
+# rtc.VideoBufferType values -> (bytes per pixel, offset of the green byte);
+# green stands in for luma on packed RGB formats
+_PACKED = {0: (4, 1), 1: (4, 2), 2: (4, 2), 3: (4, 1), 4: (3, 1)}  # RGBA ABGR ARGB BGRA RGB24
+_PLANAR = {5, 6, 7, 8, 10}  # I420 I420A I422 I444 NV12: 8-bit Y plane first
+
+
+def luma_signature(frame, grid: int = GRID) -> bytes:
+    # grid x grid samples of (approximate) luma, read straight from the buffer
+    w, h = frame.width, frame.height
+    if frame.type in _PLANAR:
+        bpp, off = 1, 0
+        data = frame.data
+    elif frame.type in _PACKED:
+        bpp, off = _PACKED[frame.type]
+        data = frame.data
+    else:
+        from livekit import rtc
+
+        frame = frame.convert(rtc.VideoBufferType.I420)
+        bpp, off, data = 1, 0, frame.data
+    step = max(1, w // grid) * bpp
+    row_bytes = w * bpp
+    out = bytearray()
+    for r in range(grid):
+        row = (r * h + h // 2) // grid
+        start = row * row_bytes + off + (step // 2 // bpp) * bpp
+        end = min(start + grid * step, (row + 1) * row_bytes)
+        out += data[start:end:step].tobytes()
+    return bytes(out)
+
+
+def signature_distance(a: bytes, b: bytes) -> float:
+    if len(a) != len(b) or not a:
+        return 255.0
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+class VideoPolicy:
+    def __init__(
+        self,
+        fps: dict | None = None,
+        change_threshold: float = CHANGE_THRESHOLD,
+        inference_size: int = INFERENCE_SIZE,
+    ) -> None:
+        self.fps = {**DEFAULT_FPS, **(fps or {})}
+        self.change_threshold = change_threshold
+        self.inference_size = inference_size
+        self.mode = "mental"
+        self.consent = False
+        self._session = None
+        self._offered = False
+        self._last_kept_at = 0.0
+        self._last_signature: bytes | None = None
+        self._pending = None
+        self.stats = {
+            "received": 0,
+            "dropped_no_consent": 0,
+            "dropped_rate": 0,
+            "dropped_unchanged": 0,
+            "kept": 0,
+            "sent": 0,
+        }
+
+    # ---------------------------
+    # Session wiring
+    # ---------------------------
+    def attach(self, session) -> None:
+        # call after session.start(): detaches the camera until consent
+        self._session = session
+        self._apply_input()
+
+    def _apply_input(self) -> None:
+        inputs = getattr(self._session, "input", None)
+        if inputs is not None and inputs.video is not None:
+            inputs.set_video_enabled(self.consent)
+
+    def set_consent(self, granted: bool) -> None:
+        if granted == self.consent:
+            return
+        self.consent = granted
+        if not granted:
+            self._pending = None
+            self._last_signature = None
+        logging.info(f"Camera consent {'granted' if granted else 'revoked'}")
+        self._apply_input()
+
+    def set_mode(self, mode: str) -> None:
+        self.mode = mode
+
+    def note_assistant(self, text: str) -> None:
+        # remember that the agent just asked about the camera, so a bare
+        # "yes"/"no" in the next user turn answers it
+        self._offered = bool(text) and _OFFER_RE.search(text.lower()) is not None
+
+    def note_user(self, text: str) -> None:
+        lower = text.lower().strip()
+        if _REVOKE_RE.search(lower) or (self._offered and _NO_RE.match(lower)):
+            self.set_consent(False)
+        elif _GRANT_RE.search(lower) or (self._offered and _YES_RE.match(lower)):
+            self.set_consent(True)
+        self._offered = False
+
+    # ---------------------------
+    # Sampling
+    # ---------------------------
+    def __call__(self, frame, session=None) -> bool:
+        # AgentSession video_sampler hook; kept frames are held for the next
+        # user turn rather than pushed (google.LLM is not a realtime model)
+        self.stats["received"] += 1
+        if not self.consent:
+            self.stats["dropped_no_consent"] += 1
+            return False
+
+        now = time.monotonic()
+        fps = self.fps.get(self.mode, 0.0)
+        if fps <= 0 or now - self._last_kept_at < 1.0 / fps:
+            self.stats["dropped_rate"] += 1
+            return False
+
+        signature = luma_signature(frame)
+        if (
+            self._last_signature is not None
+            and signature_distance(signature, self._last_signature) < self.change_threshold
+        ):
+            self._last_kept_at = now  # re-check after another interval
+            self.stats["dropped_unchanged"] += 1
+            return False
+
+        self._last_kept_at = now
+        self._last_signature = signature
+        self._pending = frame
+        self.stats["kept"] += 1
+        return True
+
+    def take_frame(self):
+        # newest kept frame not yet sent to the LLM, or None
+        frame, self._pending = self._pending, None
+        if frame is not None:
+            self.stats["sent"] += 1
+        return frame
+
+    def image_content(self):
+        frame = self.take_frame()
+        if frame is None:
+            return None
+        from livekit.agents.llm import ImageContent
+
+        scale = min(1.0, self.inference_size / max(frame.width, frame.height))
+        return ImageContent(
+            image=frame,
+            inference_width=max(1, int(frame.width * scale)),
+            inference_height=max(1, int(frame.height * scale)),
+        )